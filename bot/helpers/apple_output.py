@@ -0,0 +1,88 @@
+import re
+
+from collections import deque
+from typing import List, Optional, Tuple
+
+# Lines kept per stream for error reports
+TAIL_LINES = 200
+
+TRACK_COUNTER = re.compile(r'\bTrack\s+(\d+)\s+of\s+(\d+)', re.IGNORECASE)
+BRACKET_COUNTER = re.compile(r'\[\s*(\d+)\s*/\s*(\d+)\s*\]')
+PERCENT = re.compile(r'(\d{1,3})(?:\.\d+)?\s*%')
+FILE_DONE = re.compile(r'\b(downloaded|decrypted|completed|already exists|skipped)\b', re.IGNORECASE)
+# Final summary printed by am_downloader.sh, not a track
+RUN_DONE = re.compile(r'Download completed successfully', re.IGNORECASE)
+
+LINE_BREAK = re.compile(rb'[\r\n]')
+
+
+class LineSplitter:
+    """
+    Turns a byte stream into lines. Progress bars redraw with a bare '\\r',
+    so both '\\r' and '\\n' end a line; a partial line waits for the next chunk.
+    """
+    def __init__(self):
+        self._rest = b''
+
+    def feed(self, chunk: bytes) -> List[str]:
+        parts = LINE_BREAK.split(self._rest + chunk)
+        self._rest = parts.pop()
+        return [p.decode(errors='ignore').strip() for p in parts if p.strip()]
+
+    def flush(self) -> List[str]:
+        rest, self._rest = self._rest, b''
+        line = rest.decode(errors='ignore').strip()
+        return [line] if line else []
+
+
+class AppleOutputParser:
+    """
+    Follows the downloader's output line by line and reports what changed as
+    events: ('total', n), ('track', index), ('percent', overall_percent) and
+    ('done', tracks_done). The last TAIL_LINES lines are kept for errors.
+    """
+    def __init__(self):
+        self.tail: deque = deque(maxlen=TAIL_LINES)
+        self.total: Optional[int] = None
+        self.tracks_done = 0
+        self._track_percent = 0
+
+    def overall_percent(self) -> int:
+        if not self.total:
+            return self._track_percent
+        done = min(self.tracks_done + self._track_percent / 100, self.total)
+        return int(done / self.total * 100)
+
+    def feed(self, line: str) -> List[Tuple[str, int]]:
+        self.tail.append(line)
+        events = []
+
+        counter = TRACK_COUNTER.search(line) or BRACKET_COUNTER.search(line)
+        if counter:
+            index, total = int(counter.group(1)), int(counter.group(2))
+            if total and total != self.total:
+                self.total = total
+                events.append(('total', total))
+            self._track_percent = 0
+            events.append(('track', index))
+
+        if RUN_DONE.search(line):
+            return events
+
+        if FILE_DONE.search(line):
+            self.tracks_done += 1
+            if self.total:
+                self.tracks_done = min(self.tracks_done, self.total)
+            self._track_percent = 0
+            events.append(('done', self.tracks_done))
+            events.append(('percent', self.overall_percent()))
+            return events
+
+        percent = PERCENT.search(line)
+        if percent:
+            self._track_percent = min(100, int(percent.group(1)))
+            events.append(('percent', self.overall_percent()))
+        return events
+
+    def error_text(self) -> str:
+        return "\n".join(self.tail)
@@ -204,3 +204,137 @@ class UserSettings(DataBaseHandle):
         return None
 
 user_set_db = UserSettings()
+
+
+class QueueJobs(DataBaseHandle):
+    """Queue Mode jobs persisted until they finish, so a restart can re-queue them"""
+    def __init__(self, dburl=None):
+        if dburl is None:
+            dburl = Config.DATABASE_URL
+        super().__init__(dburl)
+
+        schema = """CREATE TABLE IF NOT EXISTS queue_jobs (
+            qid VARCHAR(32) PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            link VARCHAR(2000) NOT NULL,
+            options JSONB NOT NULL DEFAULT '{}',
+            user_data JSONB NOT NULL DEFAULT '{}',
+            provider VARCHAR(20),
+            kind VARCHAR(20),
+            admin BOOLEAN NOT NULL DEFAULT FALSE,
+            checkpoints JSONB NOT NULL DEFAULT '{}',
+            enqueued_at DOUBLE PRECISION,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        ALTER TABLE queue_jobs ADD COLUMN IF NOT EXISTS enqueued_at DOUBLE PRECISION;"""
+        cur = self.scur()
+        cur.execute(schema)
+        self._conn.commit()
+        self.ccur(cur)
+
+    def add_job(self, qid, user_id, link, options, user_data, provider, kind, admin, enqueued_at):
+        # Re-adding a known qid is a no-op so recovery never duplicates a job
+        sql = """
+        INSERT INTO queue_jobs (qid, user_id, link, options, user_data, provider, kind, admin, enqueued_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (qid) DO NOTHING;
+        """
+        cur = self.scur()
+        cur.execute(sql, (
+            qid, user_id, link,
+            psycopg2.extras.Json(options or {}),
+            psycopg2.extras.Json(user_data or {}),
+            provider, kind, bool(admin), enqueued_at
+        ))
+        self._conn.commit()
+        self.ccur(cur)
+
+    def remove_job(self, qid):
+        cur = self.scur()
+        cur.execute("DELETE FROM queue_jobs WHERE qid = %s", (qid,))
+        self._conn.commit()
+        self.ccur(cur)
+
+    def get_jobs(self):
+        """All unfinished jobs, oldest first"""
+        cur = self.scur(dictcur=True)
+        cur.execute("SELECT * FROM queue_jobs ORDER BY created_at, qid")
+        rows = cur.fetchall()
+        self.ccur(cur)
+        return rows
+
+    def save_checkpoint(self, qid, key, value):
+        """Merge one finished-item record into the job's checkpoints"""
+        sql = "UPDATE queue_jobs SET checkpoints = checkpoints || %s WHERE qid = %s"
+        cur = self.scur()
+        cur.execute(sql, (psycopg2.extras.Json({key: value}), qid))
+        self._conn.commit()
+        self.ccur(cur)
+
+queue_jobs_db = QueueJobs()
+
+
+class FileIdCache(DataBaseHandle):
+    """Telegram file_ids of uploaded media, keyed by content id and by content hash"""
+    def __init__(self, dburl=None):
+        if dburl is None:
+            dburl = Config.DATABASE_URL
+        super().__init__(dburl)
+
+        schema = """
+        CREATE TABLE IF NOT EXISTS file_id_cache (
+            id SERIAL PRIMARY KEY,
+            cache_key VARCHAR(255),
+            content_hash VARCHAR(64),
+            file_id VARCHAR(255) NOT NULL,
+            media_type VARCHAR(10) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_file_id_cache_key ON file_id_cache(cache_key);
+        CREATE INDEX IF NOT EXISTS idx_file_id_cache_hash ON file_id_cache(content_hash);
+        """
+        cur = self.scur()
+        cur.execute(schema)
+        self._conn.commit()
+        self.ccur(cur)
+
+    def get(self, cache_key=None, content_hash=None):
+        """(file_id, media_type) by key, falling back to the content hash"""
+        cur = self.scur()
+        row = None
+        if cache_key:
+            cur.execute("SELECT file_id, media_type FROM file_id_cache WHERE cache_key = %s", (cache_key,))
+            row = cur.fetchone()
+        if row is None and content_hash:
+            cur.execute(
+                "SELECT file_id, media_type FROM file_id_cache WHERE content_hash = %s ORDER BY created_at DESC LIMIT 1",
+                (content_hash,)
+            )
+            row = cur.fetchone()
+        self.ccur(cur)
+        return (row[0], row[1]) if row else (None, None)
+
+    def put(self, cache_key, content_hash, file_id, media_type):
+        cur = self.scur()
+        if cache_key:
+            sql = """
+            INSERT INTO file_id_cache (cache_key, content_hash, file_id, media_type)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (cache_key)
+            DO UPDATE SET content_hash = EXCLUDED.content_hash, file_id = EXCLUDED.file_id,
+                media_type = EXCLUDED.media_type, created_at = CURRENT_TIMESTAMP;
+            """
+        else:
+            sql = "INSERT INTO file_id_cache (cache_key, content_hash, file_id, media_type) VALUES (%s, %s, %s, %s)"
+        cur.execute(sql, (cache_key, content_hash, file_id, media_type))
+        self._conn.commit()
+        self.ccur(cur)
+
+    def remove(self, file_id):
+        """Drop a file_id Telegram no longer accepts"""
+        cur = self.scur()
+        cur.execute("DELETE FROM file_id_cache WHERE file_id = %s", (file_id,))
+        self._conn.commit()
+        self.ccur(cur)
+
+file_id_db = FileIdCache()
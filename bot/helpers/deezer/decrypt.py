@@ -0,0 +1,139 @@
+"""
+Batched Blowfish stripe decryption for Deezer media.
+
+Deezer encrypts the first 2048 bytes of every 6144-byte stripe with
+Blowfish-CBC (fixed IV 0001020304050607, fresh per stripe); the remaining
+4096 bytes are plain. Instead of one cipher call per stripe, every encrypted
+block of a buffer is gathered and decrypted with a single ECB call, then the
+CBC chaining is undone with one big XOR against the shifted ciphertext.
+
+Only depends on Cryptodome so it can be benchmarked standalone:
+    python bot/helpers/deezer/decrypt.py [MB]
+"""
+import os
+import asyncio
+
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from Cryptodome.Cipher import Blowfish
+
+BLOCK_SIZE = 2048
+STRIPE_SIZE = 3 * BLOCK_SIZE
+IV = b"\x00\x01\x02\x03\x04\x05\x06\x07"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+class StripeDecryptor:
+    """Holds one ECB cipher per track so the key schedule runs once"""
+    def __init__(self, key: bytes):
+        self.key = key
+        self._ecb = Blowfish.new(key, Blowfish.MODE_ECB)
+
+    def decrypt(self, buf, length: Optional[int] = None) -> bytes:
+        """
+        Decrypt the first `length` bytes of `buf` (defaults to all of it).
+        `length` should be a multiple of STRIPE_SIZE except for the final call.
+        """
+        view = memoryview(buf)
+        if length is None:
+            length = len(view)
+        view = view[:length]
+        # Only stripes holding a full 2048-byte block are encrypted
+        starts = range(0, length - BLOCK_SIZE + 1, STRIPE_SIZE)
+        count = len(starts)
+        if not count:
+            return bytes(view)
+
+        cipher = b''.join([view[s : s + BLOCK_SIZE] for s in starts])
+        plain = self._ecb.decrypt(cipher)
+
+        # CBC: P[i] = D(C[i]) ^ C[i-1], with C[-1] = IV at the start of every stripe
+        chain = bytearray(len(cipher))
+        chain[8:] = cipher[:-8]
+        for b in range(0, len(cipher), BLOCK_SIZE):
+            chain[b : b + 8] = IV
+        plain = (int.from_bytes(plain, 'big') ^ int.from_bytes(chain, 'big')).to_bytes(len(cipher), 'big')
+
+        out = bytearray(view)
+        plain_view = memoryview(plain)
+        for i, s in enumerate(starts):
+            out[s : s + BLOCK_SIZE] = plain_view[i * BLOCK_SIZE : (i + 1) * BLOCK_SIZE]
+        return bytes(out)
+
+
+def decrypt_stripes(key: bytes, data: bytes) -> bytes:
+    """Picklable entry point for process pool workers"""
+    return StripeDecryptor(key).decrypt(data)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+async def decrypt_async(decryptor: StripeDecryptor, data, workers: int = 0) -> bytes:
+    """
+    Decrypt a batch off the event loop: in a thread by default, or in a
+    shared process pool when `workers` > 0 so several lossless tracks can
+    decrypt on separate cores.
+    """
+    if workers <= 0:
+        return await asyncio.to_thread(decryptor.decrypt, bytes(data))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(workers), decrypt_stripes, decryptor.key, bytes(data))
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _reference_decrypt(key: bytes, buf: bytes) -> bytes:
+    """Previous implementation: a new CBC cipher for every stripe"""
+    out = bytearray()
+    for i in range(0, len(buf), STRIPE_SIZE):
+        data = buf[i : i + STRIPE_SIZE]
+        if len(data) >= BLOCK_SIZE:
+            out += Blowfish.new(key, Blowfish.MODE_CBC, IV).decrypt(data[:BLOCK_SIZE]) + data[BLOCK_SIZE:]
+        else:
+            out += data
+    return bytes(out)
+
+
+def _benchmark(size_mb: int = 64, batch: int = 64 * STRIPE_SIZE):
+    import sys
+    import time
+
+    key = os.urandom(16)
+    data = os.urandom(size_mb * 1024 * 1024 + 3000)
+
+    def run(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<24} {len(data) / elapsed / 1024 / 1024:8.1f} MB/s")
+        return result
+
+    expected = run('per-stripe cipher', lambda: _reference_decrypt(key, data))
+
+    def batched():
+        decryptor = StripeDecryptor(key)
+        return b''.join(decryptor.decrypt(data[i : i + batch]) for i in range(0, len(data), batch))
+
+    result = run(f'batched ({batch // 1024} KiB)', batched)
+    if result != expected:
+        sys.exit('batched output does not match reference')
+
+
+if __name__ == '__main__':
+    import sys
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
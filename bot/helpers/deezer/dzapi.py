@@ -9,13 +9,17 @@ from time import time
 from math import ceil
 from urllib.parse import urlparse
 from Cryptodome.Hash import MD5
-from Cryptodome.Cipher import Blowfish, AES
+from Cryptodome.Cipher import AES
 from requests.models import HTTPError
 
 from config import Config
 from bot.logger import LOGGER
 
-CHUNK_SIZE = 2048
+from .decrypt import StripeDecryptor, STRIPE_SIZE, decrypt_async
+from ..governor import governor
+
+DECRYPT_BATCH = 64 * STRIPE_SIZE
+
 
 class APIError(Exception):
     def __init__(self, type, msg, payload):
@@ -234,35 +238,61 @@ class DeezerAPI:
         return key
 
 
-    async def dl_track(self, id, url, path):
-        bf_key = self._get_blowfish_key(id)
-        async with self.session.get(url, allow_redirects=True) as resp:
-            buf = bytearray()
-            async for data, _ in resp.content.iter_chunks():
-                buf += data
-
-            encrypt_chunk_size = 3 * 2048
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            async with aiofiles.open(path, "wb") as audio:
-                buflen = len(buf)
-                for i in range(0, buflen, encrypt_chunk_size):
-                    data = buf[i : min(i + encrypt_chunk_size, buflen)]
-                    if len(data) >= 2048:
-                        decrypted_chunk = (
-                            self._decrypt_chunk(bf_key, data[:2048])
-                            + data[2048:]
-                        )
+    async def dl_track(self, id, url, path, cancel_event=None, progress_cb=None):
+        """
+        Stream the encrypted track to disk, decrypting batches of 6144-byte
+        stripes as they arrive instead of buffering the whole file.
+        Args:
+            id: track id (used to derive the Blowfish key)
+            url: encrypted media URL
+            path: destination file
+            cancel_event: optional asyncio.Event to abort the download
+            progress_cb: optional callable(done_bytes, total_bytes)
+        Returns:
+            str or None: Error message if failed, else None
+        """
+        decryptor = StripeDecryptor(self._get_blowfish_key(id))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            async with governor.slot('deezer'), self.session.get(url, allow_redirects=True) as resp:
+                if resp.status != 200:
+                    return f"HTTP Status: {resp.status}"
+                total = resp.content_length or 0
+                done = 0
+                pending = bytearray()
+                async with aiofiles.open(path, "wb") as audio:
+                    async for data, _ in resp.content.iter_chunks():
+                        if cancel_event and cancel_event.is_set():
+                            break
+                        pending += data
+                        done += len(data)
+                        await governor.throttle('deezer', len(data))
+                        # Decrypt in batches of whole stripes so one cipher call covers many blocks
+                        if len(pending) >= DECRYPT_BATCH:
+                            usable = len(pending) - len(pending) % STRIPE_SIZE
+                            await audio.write(await decrypt_async(decryptor, pending[:usable], Config.DEEZER_DECRYPT_WORKERS))
+                            del pending[:usable]
+                        if progress_cb:
+                            progress_cb(done, total)
                     else:
-                        decrypted_chunk = data
-                    await audio.write(decrypted_chunk)
+                        # Trailing partial stripe: only a full leading block is encrypted
+                        if pending:
+                            await audio.write(await decrypt_async(decryptor, pending, Config.DEEZER_DECRYPT_WORKERS))
+                        return None
+        except Exception as e:
+            self._remove_partial(path)
+            return f"Download failed: {str(e)}"
+
+        self._remove_partial(path)
+        return "Cancelled"
 
 
     @staticmethod
-    def _decrypt_chunk(key, data):
-        return Blowfish.new(
-            key,
-            Blowfish.MODE_CBC,
-            b"\x00\x01\x02\x03\x04\x05\x06\x07",
-        ).decrypt(data)
+    def _remove_partial(path):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
 
 deezerapi = DeezerAPI()
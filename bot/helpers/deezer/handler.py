@@ -7,6 +7,10 @@ from .dzapi import deezerapi
 from ..legacy_utils import *
 from ..legacy_uploader import *
 from ..metadata import set_metadata, get_audio_extension
+from ..tasks import task_manager
+from .. import file_cache
+from ..media_cache import media_cache
+from ..progress import ProgressReporter
 
 from ...settings import bot_set
 import bot.helpers.translations as lang
@@ -29,6 +33,13 @@ async def start_deezer(url:str, user: dict):
 
 async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=True, \
     filepath=None, disable_link=False):
+    # Recovered queue job: skip tracks finished before the restart
+    checkpoint = f"deezer:{item_id}"
+    if task_manager.track_done(user, checkpoint, track_meta, upload):
+        return True
+
+    # A single track gets byte-level progress; album/playlist tracks report through progress_message
+    standalone = track_meta is None
 
     if not track_meta:
         if int(item_id) < 0: # For user uploaded
@@ -44,6 +55,11 @@ async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=
 
         filepath = f"{Config.LEGACY_DOWNLOAD_BASE_DIR}/{user['r_id']}/{track_meta['provider']}/{track_meta['albumartist']}/{track_meta['album']}"
 
+    track_meta['cache_key'] = file_cache.cache_key('deezer', item_id, track_meta['quality'])
+    if upload and await send_cached_track(user, track_meta['cache_key']):
+        task_manager.save_checkpoint(user, checkpoint, uploaded=True)
+        return True
+
     url = await deezerapi.get_track_url(
         item_id,
         track_meta['token'],
@@ -58,13 +74,34 @@ async def start_track(item_id: int, user: dict, track_meta: dict | None, upload=
     filepath += f"/{filename}.{track_meta['extension']}"
     track_meta['filepath'] = filepath = sanitize_filepath(filepath)
 
-    # deezerapi.dl_track currently does not support cancel_event; left as-is
-    await deezerapi.dl_track(item_id, url, track_meta['filepath'])
+    reporter = user.get('progress')
+    own_reporter = None
+    if reporter is None and standalone:
+        reporter = own_reporter = ProgressReporter(user['bot_msg'], label="Deezer")
+
+    # Shared with concurrent requests for the same track and reused from the media cache
+    try:
+        err = await media_cache.obtain(
+            track_meta['cache_key'], filepath,
+            lambda: deezerapi.dl_track(
+                item_id, url, filepath,
+                cancel_event=user.get('cancel_event'),
+                progress_cb=reporter.on_download_progress if reporter else None
+            )
+        )
+    finally:
+        # The handler edits bot_msg itself from here on
+        if own_reporter:
+            await own_reporter.close(render=False)
+    if err:
+        return await send_message(user, err)
 
     await set_metadata(track_meta)
+    task_manager.save_checkpoint(user, checkpoint, track_meta['filepath'])
 
     if upload:
         await track_upload(track_meta, user, disable_link)
+        task_manager.save_checkpoint(user, checkpoint, uploaded=True)
 
     return True
 
@@ -96,7 +133,9 @@ async def start_album(album_id:int, user:dict, upload=True):
         'title': album_meta['title'],
         'type': album_meta['type']
     }
-    await run_concurrent_tasks(tasks, update_details)
+    # Telegram uploads start while the rest of the album downloads
+    pipeline = upload_pipeline(album_meta, user) if upload else None
+    await run_concurrent_tasks(tasks, update_details, pipeline)
 
     if bot_set.album_zip:
         await edit_message(user['bot_msg'], lang.s.ZIPPING)
@@ -154,7 +193,7 @@ async def start_playlist(playlist_id, user):
         tasks = []
         for track in play_meta['tracks']:
             tasks.append(start_track(track['itemid'], user, track, upload, playlist_folder))
-        await run_concurrent_tasks(tasks, update_details)
+        await run_concurrent_tasks(tasks, update_details, upload_pipeline(play_meta, user))
     else:
         i = 0
         if bot_set.playlist_zip: upload = False
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+
+from typing import Optional
+
+from bot.logger import LOGGER
+
+JOURNAL_SUFFIX = '.part.json'
+SAVE_INTERVAL = 2.0  # seconds between journal flushes while downloading
+
+
+class DownloadJournal:
+    """
+    Sidecar record of a partially downloaded file (`<path>.part.json`).
+    Stores the remote validators and the byte ranges already on disk so a
+    retry or a re-queued task after restart continues with Range requests.
+    Ranges are half-open [start, end) and kept sorted and merged.
+    """
+    def __init__(self, path: str, url: str, length: int,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 done: Optional[list] = None):
+        self.path = path
+        self.url = url
+        self.length = length
+        self.etag = etag
+        self.last_modified = last_modified
+        self.done: list[list[int]] = done or []
+        self._last_save = 0.0
+
+    @property
+    def journal_path(self) -> str:
+        return self.path + JOURNAL_SUFFIX
+
+    @classmethod
+    def load(cls, path: str) -> Optional['DownloadJournal']:
+        """Read the journal next to `path`, or None if missing/corrupt"""
+        try:
+            with open(path + JOURNAL_SUFFIX, 'r') as f:
+                data = json.load(f)
+            return cls(
+                path,
+                data['url'],
+                int(data['length']),
+                data.get('etag'),
+                data.get('last_modified'),
+                [[int(s), int(e)] for s, e in data.get('done', [])]
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            LOGGER.debug(f"Ignoring unreadable download journal for {path}: {e}")
+            return None
+
+    def matches(self, url: str, length: int, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """
+        Whether the remote file is still the one we started. Signed URLs change
+        between requests, so validators win over the URL when the server sends them.
+        """
+        if length != self.length:
+            return False
+        if etag and self.etag:
+            return etag == self.etag
+        if last_modified and self.last_modified:
+            return last_modified == self.last_modified
+        return url == self.url
+
+    @property
+    def validator(self) -> Optional[str]:
+        """Value for If-Range so a changed file answers 200 instead of a stale range"""
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+
+    def add(self, start: int, end: int):
+        """Mark [start, end) as written"""
+        if end <= start:
+            return
+        merged = []
+        placed = False
+        for s, e in self.done:
+            if e < start or s > end:
+                if not placed and s > end:
+                    merged.append([start, end])
+                    placed = True
+                merged.append([s, e])
+            else:
+                start, end = min(s, start), max(e, end)
+        if not placed:
+            merged.append([start, end])
+        self.done = merged
+
+    def completed(self) -> int:
+        return sum(e - s for s, e in self.done)
+
+    def missing(self) -> list[tuple[int, int]]:
+        """Gaps still to fetch as half-open [start, end) ranges"""
+        gaps = []
+        cursor = 0
+        for s, e in self.done:
+            if s > cursor:
+                gaps.append((cursor, s))
+            cursor = max(cursor, e)
+        if cursor < self.length:
+            gaps.append((cursor, self.length))
+        return gaps
+
+    def save(self, force: bool = False):
+        """Atomically persist the journal, throttled unless forced"""
+        now = time.monotonic()
+        if not force and now - self._last_save < SAVE_INTERVAL:
+            return
+        self._last_save = now
+        data = {
+            'url': self.url,
+            'length': self.length,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'done': self.done,
+        }
+        tmp = self.journal_path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.journal_path)
+        except OSError as e:
+            LOGGER.debug(f"Could not write download journal {self.journal_path}: {e}")
+
+    def remove(self):
+        remove_journal(self.path)
+
+
+def remove_journal(path: str):
+    """Delete the journal belonging to `path` if present"""
+    for p in (path + JOURNAL_SUFFIX, path + JOURNAL_SUFFIX + '.tmp'):
+        try:
+            if os.path.exists(p):
+                os.remove(p)
+        except Exception:
+            pass
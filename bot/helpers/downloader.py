@@ -0,0 +1,352 @@
+import os
+import math
+import asyncio
+import aiohttp
+
+from typing import Optional, NamedTuple
+from aiohttp import ClientTimeout
+
+from config import Config
+from bot.logger import LOGGER
+from .http_client import http_client
+from .download_journal import JOURNAL_SUFFIX, DownloadJournal, remove_journal
+from .governor import governor
+
+CHUNK_SIZE = 64 * 1024
+WRITE_BATCH = 8 * CHUNK_SIZE  # bytes buffered before one pwrite in a worker thread
+
+
+class _RangeUnsupported(Exception):
+    """Server ignored the Range header; caller falls back to a single stream"""
+
+
+def _remove_partial(path: str):
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception:
+        pass
+
+
+def _pwrite(path: str, data: bytes, offset: int):
+    # Own descriptor per batch, so a write still running after its task was
+    # cancelled can never land in a descriptor the caller closed and reused
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.pwrite(fd, data, offset)
+    finally:
+        os.close(fd)
+
+
+async def _write_at(path: str, pending: bytearray, offset: int, journal: DownloadJournal) -> int:
+    """Write `pending` at `offset` off the event loop, journal it and empty the buffer; returns the next offset"""
+    data = bytes(pending)
+    pending.clear()
+    await asyncio.to_thread(_pwrite, path, data, offset)
+    journal.add(offset, offset + len(data))
+    journal.save()
+    return offset + len(data)
+
+
+def _request_timeout(timeout: int) -> ClientTimeout:
+    # Idle-read timeout instead of a total deadline so large files are not cut off mid-stream
+    return ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+
+
+class RemoteFile(NamedTuple):
+    size: Optional[int]
+    ranges: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def _remote_file(response: aiohttp.ClientResponse) -> RemoteFile:
+    """Size, validators and range support from the headers of a plain 200 GET"""
+    length = response.headers.get('Content-Length')
+    return RemoteFile(
+        int(length) if length and length.isdigit() else None,
+        response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+    )
+
+
+def _worth_ranging(path: str, remote: RemoteFile) -> bool:
+    """Split only large files, or resume one that has a journal on disk"""
+    if not (remote.ranges and remote.size):
+        return False
+    if os.path.exists(path + JOURNAL_SUFFIX):
+        return True
+    return Config.DOWNLOAD_SEGMENTS > 1 and remote.size >= Config.DOWNLOAD_SEGMENT_MIN_SIZE
+
+
+def _open_journal(url: str, path: str, remote: RemoteFile) -> DownloadJournal:
+    """Reuse the sidecar journal if it still describes the same remote file"""
+    journal = DownloadJournal.load(path)
+    if journal and journal.matches(url, remote.size, remote.etag, remote.last_modified) \
+            and os.path.exists(path) and os.path.getsize(path) == remote.size:
+        journal.url = url
+        LOGGER.debug(f"Resuming {path} at {journal.completed()}/{remote.size} bytes")
+        return journal
+    remove_journal(path)
+    return DownloadJournal(path, url, remote.size, remote.etag, remote.last_modified)
+
+
+async def fetch_file(url, path, retries=3, timeout=30, cancel_event: asyncio.Event | None = None,
+                     provider: Optional[str] = None) -> Optional[str]:
+    """
+    Download a file, splitting it into concurrent byte-range requests when
+    the server supports ranges and the file is large enough.
+    Whenever the server supports ranges (small files included) a
+    `<path>.part.json` journal is kept so retries and re-queued tasks
+    continue from the bytes already on disk.
+    Args:
+        url: URL to download
+        path: Full path to save the file
+        retries: Attempts per request
+        timeout: Connect / idle-read timeout in seconds
+        cancel_event: Optional asyncio.Event to signal cancellation
+        provider: Governor scope the transfer is charged to
+    Returns:
+        str or None: Error message if failed, else None
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if cancel_event and cancel_event.is_set():
+        _remove_partial(path)
+        remove_journal(path)
+        return "Cancelled"
+
+    try:
+        async with governor.slot(provider):
+            return await _fetch(url, path, retries, timeout, cancel_event, provider)
+    except Exception as e:
+        _remove_partial(path)
+        remove_journal(path)
+        return f"Unexpected error: {str(e)}"
+
+
+async def _fetch(url, path, retries, timeout, cancel_event, provider) -> Optional[str]:
+    # Waiting for a governor slot can take a while; the task may have been cancelled meanwhile
+    if cancel_event and cancel_event.is_set():
+        _remove_partial(path)
+        remove_journal(path)
+        return "Cancelled"
+    session = await http_client.get_session()
+
+    # The first plain GET tells whether ranges are worth it; if not, its body is the download
+    for attempt in range(1, retries + 1):
+        try:
+            if cancel_event and cancel_event.is_set():
+                _remove_partial(path)
+                return "Cancelled"
+            async with session.get(url, timeout=_request_timeout(timeout)) as response:
+                if response.status != 200:
+                    return f"HTTP Status: {response.status}"
+                remote = _remote_file(response)
+                if not _worth_ranging(path, remote):
+                    if remote.ranges and remote.size:
+                        # A single range: stream this body, but journal it so a drop can resume
+                        journal = DownloadJournal(path, url, remote.size, remote.etag, remote.last_modified)
+                        return await _write_journaled(response, path, journal, cancel_event, provider)
+                    remove_journal(path)
+                    return await _write_response(response, path, cancel_event, provider)
+                # Drop the body; the file is fetched as ranges below
+                response.close()
+            break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if os.path.exists(path + JOURNAL_SUFFIX):
+                # The journaled body was cut off; fetch only the missing bytes
+                break
+            if attempt == retries:
+                return f"Failed after {retries} attempts: {str(e)}"
+            await asyncio.sleep(2 ** attempt)
+
+    journal = _open_journal(url, path, remote)
+    segments = Config.DOWNLOAD_SEGMENTS if remote.size >= Config.DOWNLOAD_SEGMENT_MIN_SIZE else 1
+    try:
+        return await _ranged_download(session, url, path, journal, max(1, segments), retries, timeout, cancel_event, provider)
+    except _RangeUnsupported:
+        journal.remove()
+        LOGGER.debug(f"Range requests ignored or file changed, falling back to single stream: {path}")
+    return await _single_download(session, url, path, retries, timeout, cancel_event, provider)
+
+
+async def _write_response(response, path, cancel_event, provider) -> Optional[str]:
+    """Stream a response body to `path`; network errors propagate to the caller's retry loop"""
+    with open(path, 'wb') as f:
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if cancel_event and cancel_event.is_set():
+                f.close()
+                _remove_partial(path)
+                return "Cancelled"
+            f.write(chunk)
+            await governor.throttle(provider, len(chunk))
+    return None
+
+
+async def _write_journaled(response, path, journal: DownloadJournal, cancel_event, provider) -> Optional[str]:
+    """
+    Stream a response body to `path` as one journaled range, so a
+    connection dropped mid-body resumes through _ranged_download
+    """
+    size = journal.length
+    offset = 0
+    pending = bytearray()
+    # Full length up front, as _open_journal only resumes a file of the remote size
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+    journal.save(force=True)
+    try:
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if cancel_event and cancel_event.is_set():
+                _remove_partial(path)
+                journal.remove()
+                return "Cancelled"
+            pending += chunk
+            if len(pending) >= WRITE_BATCH:
+                offset = await _write_at(path, pending, offset, journal)
+            await governor.throttle(provider, len(chunk))
+        if pending:
+            offset = await _write_at(path, pending, offset, journal)
+        if offset < size:
+            raise aiohttp.ClientPayloadError(f"Body ended early at {offset}/{size}")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        # Keep what arrived before the connection dropped
+        if pending:
+            await _write_at(path, pending, offset, journal)
+        journal.save(force=True)
+        raise
+    except BaseException:
+        journal.save(force=True)
+        raise
+    journal.remove()
+    return None
+
+
+async def _single_download(session, url, path, retries, timeout, cancel_event, provider) -> Optional[str]:
+    for attempt in range(1, retries + 1):
+        try:
+            if cancel_event and cancel_event.is_set():
+                _remove_partial(path)
+                return "Cancelled"
+            async with session.get(url, timeout=_request_timeout(timeout)) as response:
+                if response.status != 200:
+                    return f"HTTP Status: {response.status}"
+                return await _write_response(response, path, cancel_event, provider)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                return f"Failed after {retries} attempts: {str(e)}"
+            await asyncio.sleep(2 ** attempt)
+
+
+def _split(gaps: list[tuple[int, int]], segments: int) -> list[tuple[int, int]]:
+    """Cut the missing ranges into roughly `segments` equal inclusive ranges"""
+    total = sum(e - s for s, e in gaps)
+    part = max(1, math.ceil(total / segments))
+    ranges = []
+    for start, end in gaps:
+        for s in range(start, end, part):
+            ranges.append((s, min(s + part, end) - 1))
+    return ranges
+
+
+def _reserve(path: str, size: int, resuming: bool):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if not resuming:
+            # Reserve the whole file up front so segments can land at their final offsets
+            os.ftruncate(fd, 0)
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError:
+                    os.ftruncate(fd, size)
+            else:
+                os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+async def _ranged_download(session, url, path, journal: DownloadJournal, segments, retries, timeout, cancel_event, provider) -> Optional[str]:
+    """Fetch the missing bytes as concurrent ranges, written in place by batched pwrites"""
+    size = journal.length
+    resuming = bool(journal.done)
+    ranges = _split(journal.missing(), segments)
+
+    await asyncio.to_thread(_reserve, path, size, resuming)
+    journal.save(force=True)
+
+    abort = asyncio.Event()
+    validator = journal.validator if resuming else None
+
+    async def fetch_range(start: int, end: int) -> Optional[str]:
+        offset = start
+        for attempt in range(1, retries + 1):
+            if abort.is_set():
+                return None
+            if cancel_event and cancel_event.is_set():
+                return "Cancelled"
+            # Received bytes are buffered; `offset` only counts those already on disk
+            pending = bytearray()
+            try:
+                headers = {'Range': f'bytes={offset}-{end}'}
+                if validator:
+                    headers['If-Range'] = validator
+                async with session.get(url, headers=headers, timeout=_request_timeout(timeout)) as response:
+                    if response.status == 200:
+                        raise _RangeUnsupported()
+                    if response.status != 206:
+                        return f"HTTP Status: {response.status}"
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        if abort.is_set():
+                            return None
+                        if cancel_event and cancel_event.is_set():
+                            return "Cancelled"
+                        pending += chunk
+                        if len(pending) >= WRITE_BATCH:
+                            offset = await _write_at(path, pending, offset, journal)
+                        await governor.throttle(provider, len(chunk))
+                    if pending:
+                        offset = await _write_at(path, pending, offset, journal)
+                if offset > end:
+                    return None
+                raise aiohttp.ClientPayloadError(f"Range {start}-{end} ended early at {offset}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Keep what arrived, then retry only the bytes that are still missing
+                if pending:
+                    offset = await _write_at(path, pending, offset, journal)
+                if attempt == retries:
+                    return f"Failed after {retries} attempts: {str(e)}"
+                await asyncio.sleep(2 ** attempt)
+        return f"Failed after {retries} attempts"
+
+    async def guarded(start: int, end: int) -> Optional[str]:
+        try:
+            err = await fetch_range(start, end)
+        except BaseException:
+            abort.set()
+            raise
+        if err:
+            abort.set()
+        return err
+
+    results = await asyncio.gather(*(guarded(s, e) for s, e in ranges), return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, _RangeUnsupported):
+            raise result
+    errors = [r for r in results if r]
+    if errors:
+        if "Cancelled" in errors:
+            _remove_partial(path)
+            journal.remove()
+            return "Cancelled"
+        # Keep the partial file and its journal so the next attempt resumes
+        journal.save(force=True)
+        first = errors[0]
+        return first if isinstance(first, str) else f"Unexpected error: {str(first)}"
+    journal.remove()
+    return None
@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+
+from typing import Optional
+
+from pyrogram.types import Message
+
+from config import Config
+from bot.logger import LOGGER
+from bot.helpers.database.pg_impl import file_id_db
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def cache_key(provider: str, content_id, quality: Optional[str]) -> str:
+    """Key of one delivered item, e.g. 'qobuz:12345:24B - 96.0k'"""
+    return f"{provider.lower()}:{content_id}:{quality or ''}"
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def content_hash(path: str) -> Optional[str]:
+    """blake2b of the file, computed off the event loop"""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, _hash_file, path)
+    except OSError as e:
+        LOGGER.debug(f"Could not hash {path}: {e}")
+        return None
+
+
+def lookup(key: Optional[str] = None, digest: Optional[str] = None) -> Optional[str]:
+    """Cached file_id for a key or content hash, None on miss or when disabled"""
+    if not Config.FILE_ID_CACHE or not (key or digest):
+        return None
+    try:
+        file_id, _ = file_id_db.get(key, digest)
+        return file_id
+    except Exception as e:
+        LOGGER.debug(f"File id cache lookup failed: {e}")
+        return None
+
+
+def remember(key: Optional[str], digest: Optional[str], msg: Optional[Message]):
+    """Store the file_id of an uploaded message under its key and content hash"""
+    if not Config.FILE_ID_CACHE or msg is None or not (key or digest):
+        return
+    for media_type in ('audio', 'document', 'video'):
+        media = getattr(msg, media_type, None)
+        if media:
+            break
+    else:
+        return
+    try:
+        file_id_db.put(key, digest, media.file_id, media_type)
+    except Exception as e:
+        LOGGER.debug(f"File id cache store failed: {e}")
+
+
+def forget(file_id: str):
+    try:
+        file_id_db.remove(file_id)
+    except Exception as e:
+        LOGGER.debug(f"File id cache remove failed: {e}")
@@ -0,0 +1,110 @@
+import asyncio
+import aiolimiter
+
+from typing import Optional
+from contextlib import asynccontextmanager
+
+from config import Config
+from bot.logger import LOGGER
+
+
+class _Scope:
+    """Connection slots plus an optional bytes/sec token bucket"""
+    def __init__(self, name: str, slots: int, rate: int):
+        self.name = name
+        self.slots = slots
+        self.rate = rate
+        self._sem = asyncio.Semaphore(slots) if slots > 0 else None
+        self._limiter = aiolimiter.AsyncLimiter(rate, 1) if rate > 0 else None
+        self.active = 0
+        self.waiting = 0
+        self.bytes = 0
+
+    async def acquire(self):
+        if self._sem:
+            self.waiting += 1
+            try:
+                await self._sem.acquire()
+            finally:
+                self.waiting -= 1
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        if self._sem:
+            self._sem.release()
+
+    async def consume(self, nbytes: int):
+        self.bytes += nbytes
+        if not self._limiter:
+            return
+        # AsyncLimiter rejects requests larger than the bucket, so drain in bucket-sized pieces
+        while nbytes > 0:
+            amount = min(nbytes, self.rate)
+            await self._limiter.acquire(amount)
+            nbytes -= amount
+
+
+class ResourceGovernor:
+    """
+    Central budget for transfers shared by every provider and uploader.
+    Each transfer holds one global slot and one slot of its own scope
+    (provider name such as 'qobuz', or 'upload'); streamed bytes are charged
+    against both token buckets. Slots are always taken global-first so two
+    transfers can never wait on each other in opposite order.
+    """
+    def __init__(self):
+        self._global: Optional[_Scope] = None
+        self._scopes: dict[str, _Scope] = {}
+
+    def _get_global(self) -> _Scope:
+        if self._global is None:
+            self._global = _Scope('global', Config.GOVERNOR_GLOBAL_SLOTS, Config.GOVERNOR_GLOBAL_RATE)
+        return self._global
+
+    def _get_scope(self, name: Optional[str]) -> _Scope:
+        name = name or 'generic'
+        scope = self._scopes.get(name)
+        if scope is None:
+            if name == 'upload':
+                # Pyrogram and rclone stream uploads themselves, so only slots apply
+                slots, rate = Config.GOVERNOR_UPLOAD_SLOTS, 0
+            else:
+                slots, rate = Config.GOVERNOR_PROVIDER_SLOTS, Config.GOVERNOR_PROVIDER_RATE
+            scope = self._scopes[name] = _Scope(name, slots, rate)
+        return scope
+
+    @asynccontextmanager
+    async def slot(self, scope: Optional[str] = None):
+        """Hold one global and one scope slot for the duration of a transfer"""
+        outer = self._get_global()
+        inner = self._get_scope(scope)
+        await outer.acquire()
+        try:
+            await inner.acquire()
+            try:
+                yield
+            finally:
+                inner.release()
+        finally:
+            outer.release()
+
+    async def throttle(self, scope: Optional[str], nbytes: int):
+        """Charge streamed bytes to the scope and global buckets, sleeping if over budget"""
+        await self._get_scope(scope).consume(nbytes)
+        await self._get_global().consume(nbytes)
+
+    def stats(self) -> dict:
+        """Active/waiting transfers and bytes moved per scope"""
+        scopes = [self._get_global()] + list(self._scopes.values())
+        return {
+            s.name: {'active': s.active, 'waiting': s.waiting, 'slots': s.slots, 'bytes': s.bytes}
+            for s in scopes
+        }
+
+    def log_stats(self):
+        LOGGER.debug(f"GOVERNOR : {self.stats()}")
+
+
+# Singleton
+governor = ResourceGovernor()
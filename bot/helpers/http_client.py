@@ -0,0 +1,97 @@
+import asyncio
+import aiohttp
+
+from typing import Optional
+from aiohttp import ClientTimeout, TraceConfig
+
+from config import Config
+from bot.logger import LOGGER
+
+
+class HttpClient:
+    """
+    Process-wide pooled aiohttp session shared by every download path.
+    Keeps TCP/TLS connections alive between files so an album reuses the
+    same few sockets instead of handshaking once per track.
+    """
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+        self.counters = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'dns_cache_hits': 0,
+            'dns_cache_misses': 0,
+        }
+
+    def _trace_config(self) -> TraceConfig:
+        trace = TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.counters['requests'] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.counters['connections_created'] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.counters['connections_reused'] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self.counters['dns_cache_hits'] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self.counters['dns_cache_misses'] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    async def start(self):
+        """Create the shared session (idempotent)"""
+        await self.get_session()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it lazily on first use"""
+        if self._session and not self._session.closed:
+            return self._session
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=Config.HTTP_POOL_LIMIT,
+                    limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+                    ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+                    use_dns_cache=True,
+                    keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=ClientTimeout(total=None, sock_connect=30),
+                    trace_configs=[self._trace_config()],
+                )
+                LOGGER.info(
+                    f"HTTP : Pooled session ready (limit={Config.HTTP_POOL_LIMIT}, "
+                    f"per_host={Config.HTTP_POOL_LIMIT_PER_HOST}, dns_ttl={Config.HTTP_DNS_CACHE_TTL}s)"
+                )
+        return self._session
+
+    def stats(self) -> dict:
+        """Snapshot of connection counters with the reuse ratio"""
+        snapshot = dict(self.counters)
+        opened = snapshot['connections_created'] + snapshot['connections_reused']
+        snapshot['reuse_ratio'] = round(snapshot['connections_reused'] / opened, 3) if opened else 0.0
+        return snapshot
+
+    async def close(self):
+        """Close the shared session and log how often connections were reused"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            LOGGER.info(f"HTTP : Session closed - {self.stats()}")
+        self._session = None
+
+
+# Singleton
+http_client = HttpClient()
@@ -1,7 +1,12 @@
 import os
 
 from ..settings import bot_set
-from .message import send_message, edit_message
+from .message import send_message, edit_message, dispatch_uploads
+from .governor import governor
+from .pipeline import UploadPipeline
+from .tasks import task_manager
+from . import file_cache
+from .zipper import CHUNK_SIZE, VirtualZip, restat, write_zip
 from .utils import *
 
 #
@@ -32,10 +37,8 @@ async def album_upload(metadata, user):
         await local_upload(metadata, user)
     elif bot_set.upload_mode == 'Telegram':
         if bot_set.album_zip:
-            for item in metadata['folderpath']:
-                await send_message(user,item,'doc',
-                    caption=await create_simple_text(metadata, user)
-                )
+            caption = await create_simple_text(metadata, user)
+            await dispatch_uploads(send_message(user, item, 'doc', caption=caption) for item in metadata['folderpath'])
         else:
             await batch_telegram_upload(metadata, user)
     else:
@@ -56,10 +59,8 @@ async def artist_upload(metadata, user):
         await local_upload(metadata, user)
     elif bot_set.upload_mode == 'Telegram':
         if bot_set.artist_zip:
-            for item in metadata['folderpath']:
-                await send_message(user,item,'doc',
-                    caption=await create_simple_text(metadata, user)
-                )
+            caption = await create_simple_text(metadata, user)
+            await dispatch_uploads(send_message(user, item, 'doc', caption=caption) for item in metadata['folderpath'])
         else:
             pass # artist telegram uploads are handled by album fucntion
     else:
@@ -81,10 +82,8 @@ async def playlist_upload(metadata, user):
         await local_upload(metadata, user)
     elif bot_set.upload_mode == 'Telegram':
         if bot_set.playlist_zip:
-            for item in metadata['folderpath']:
-                await send_message(user,item,'doc',
-                    caption=await create_simple_text(metadata, user)
-                )
+            caption = await create_simple_text(metadata, user)
+            await dispatch_uploads(send_message(user, item, 'doc', caption=caption) for item in metadata['folderpath'])
         else:
             await batch_telegram_upload(metadata, user)
     else:
@@ -124,13 +123,61 @@ async def rclone_upload(user, realpath):
         rclone_link, index_link
     """
     path = f"{Config.DOWNLOAD_BASE_DIR}/{user['r_id']}/"
+    if isinstance(realpath, VirtualZip):
+        remote = f"{Config.RCLONE_DEST}/{Path(realpath.path).relative_to(path)}"
+        if await rclone_rcat(realpath, remote):
+            # Uploaded; remove its files so the copy below skips them
+            realpath.discard()
+        else:
+            # Write the zip for real and let the copy below upload it
+            realpath.close()
+            await asyncio.to_thread(write_zip, realpath.path, restat(realpath.sources), remove_sources=True)
+        realpath = realpath.path
     cmd = f'rclone copy --config ./rclone.conf "{path}" "{Config.RCLONE_DEST}"'
-    task = await asyncio.create_subprocess_shell(cmd)
-    await task.wait()
+    async with governor.slot('upload'):
+        task = await asyncio.create_subprocess_shell(cmd)
+        await task.wait()
     r_link, i_link = await create_link(realpath, Config.DOWNLOAD_BASE_DIR + f"/{user['r_id']}/")
     return r_link, i_link
 
 
+async def rclone_rcat(vzip, remote):
+    """
+    Stream a virtual zip into `rclone rcat`, so the archive is never written locally
+    Args:
+        vzip: VirtualZip to upload
+        remote: full remote path of the zip
+    Returns:
+        True if rclone received the whole archive
+    """
+    complete = False
+    cmd = f'rclone rcat --config ./rclone.conf --size {vzip.size} "{remote}"'
+    async with governor.slot('upload'):
+        task = await asyncio.create_subprocess_shell(cmd, stdin=asyncio.subprocess.PIPE)
+        try:
+            vzip.seek(0)
+            while True:
+                chunk = await asyncio.to_thread(vzip.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                task.stdin.write(chunk)
+                await task.stdin.drain()
+            task.stdin.close()
+            complete = True
+        except (BrokenPipeError, ConnectionResetError):
+            # rclone exited early; its return code below tells why
+            pass
+        except OSError as e:
+            # A source changed or vanished since the zip was planned
+            LOGGER.error(f"rclone rcat aborted for {remote}: {e}")
+            task.kill()
+        await task.wait()
+    if task.returncode != 0 or not complete:
+        LOGGER.error(f"rclone rcat failed for {remote} (exit {task.returncode})")
+        return False
+    return True
+
+
 async def local_upload(metadata, user):
     """
     Copies directory to local storage and merges contents if the destination exists.
@@ -165,7 +212,52 @@ async def telegram_upload(track, user):
     Args:
         track: track metadata
         """
-    await send_message(user, track['filepath'], 'audio', meta=track)
+    await send_message(user, track['filepath'], 'audio', meta=track, cache_key=track.get('cache_key'))
+
+
+async def send_cached_track(user, key):
+    """
+    Deliver a track uploaded earlier by its Telegram file_id, skipping both
+    download and upload. Returns True when sent.
+    Args:
+        user: user details
+        key: file_cache.cache_key of the track
+    """
+    if bot_set.upload_mode != 'Telegram':
+        return False
+    file_id = file_cache.lookup(key)
+    if not file_id:
+        return False
+    if await send_message(user, file_id, 'cached'):
+        return True
+    file_cache.forget(file_id)
+    return False
+
+
+def upload_pipeline(metadata, user):
+    """
+    Pipeline that uploads album/playlist tracks to Telegram as soon as they are
+    downloaded. None when the upload needs the whole folder (zip, rclone, local).
+    Args:
+        metadata: album or playlist metadata
+        user: user details
+    """
+    if bot_set.upload_mode != 'Telegram':
+        return None
+    if metadata['type'] == 'album' and bot_set.album_zip:
+        return None
+    if metadata['type'] == 'playlist' and bot_set.playlist_zip:
+        return None
+
+    async def _upload(track):
+        if track.get('uploaded'):
+            # Sent before a restart
+            return
+        await telegram_upload(track, user)
+        track['uploaded'] = True
+        task_manager.save_checkpoint(user, f"{track['provider'].lower()}:{track['itemid']}", uploaded=True)
+
+    return UploadPipeline(metadata['tracks'], _upload)
 
 
 async def batch_telegram_upload(metadata, user):
@@ -175,12 +267,15 @@ async def batch_telegram_upload(metadata, user):
         user: user details
     """
     if metadata['type'] == 'album' or metadata['type'] == 'playlist':
-        for track in metadata['tracks']:
-            try:
-                await telegram_upload(track, user)
-            except FileNotFoundError:
-                pass
+        # skip tracks already sent by the upload pipeline (or before a restart)
+        tracks = [track for track in metadata['tracks'] if not track.get('uploaded')]
     elif metadata['type'] == 'artist':
-        for album in metadata['albums']:
-            for track in album['tracks']:
-                await telegram_upload(track, user)
+        tracks = [track for album in metadata['albums'] for track in album['tracks'] if not track.get('uploaded')]
+    else:
+        return
+
+    results = await dispatch_uploads(telegram_upload(track, user) for track in tracks)
+    for track, result in zip(tracks, results):
+        # FileNotFoundError: track was not available for download
+        if isinstance(result, Exception) and not isinstance(result, FileNotFoundError):
+            LOGGER.error(f"Upload failed for {track.get('filepath')}: {result}")
@@ -1,13 +1,10 @@
 import os
 import math
-import aiohttp
 import asyncio
 import shutil
-import zipfile
 
 from pathlib import Path
 from urllib.parse import quote
-from aiohttp import ClientTimeout
 from pyrogram.errors import MessageNotModified
 from concurrent.futures import ThreadPoolExecutor
 from pyrogram.errors import FloodWait
@@ -19,62 +16,28 @@ from ..logger import LOGGER
 from ..settings import bot_set
 from .buttons.links import links_button
 from .message import send_message, edit_message
+from .downloader import fetch_file
+from .zipper import discard_zip, plan_virtual_zip_async, scan_folder, split_sources, write_zip
 
 
 MAX_SIZE = 1.9 * 1024 * 1024 * 1024  # 2GB
 # download folder structure : BASE_DOWNLOAD_DIR + message_r_id
 
-async def download_file(url, path, retries=3, timeout=30, cancel_event: asyncio.Event | None = None):
+async def download_file(url, path, retries=3, timeout=30, cancel_event: asyncio.Event | None = None, provider: str | None = None):
     """
-    Download a file with retry logic, timeout, and cooperative cancellation
+    Download a file with retry logic, timeout, and cooperative cancellation.
+    Large files are fetched as parallel byte ranges when the server allows it.
     Args:
         url (str): URL to download
         path (str): Full path to save the file
         retries (int): Number of retry attempts
-        timeout (int): Timeout in seconds
+        timeout (int): Connect / idle-read timeout in seconds
         cancel_event: Optional asyncio.Event to signal cancellation
+        provider: Governor scope for concurrency/bandwidth limits
     Returns:
         str or None: Error message if failed, else None
     """
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-
-    for attempt in range(1, retries + 1):
-        try:
-            if cancel_event and cancel_event.is_set():
-                # Clean partial file if any
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                except Exception:
-                    pass
-                return "Cancelled"
-            async with aiohttp.ClientSession(timeout=ClientTimeout(total=timeout)) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        with open(path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(1024 * 4):
-                                if cancel_event and cancel_event.is_set():
-                                    try:
-                                        f.close()
-                                    except Exception:
-                                        pass
-                                    try:
-                                        if os.path.exists(path):
-                                            os.remove(path)
-                                    except Exception:
-                                        pass
-                                    return "Cancelled"
-                                f.write(chunk)
-                        return None
-                    else:
-                        return f"HTTP Status: {response.status}"
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if attempt == retries:
-                return f"Failed after {retries} attempts: {str(e)}"
-            await asyncio.sleep(2 ** attempt)
-        except Exception as e:
-            return f"Unexpected error: {str(e)}"
-
+    return await fetch_file(url, path, retries, timeout, cancel_event, provider)
 
 
 async def format_string(text:str, data:dict, user=None):
@@ -111,25 +74,50 @@ async def format_string(text:str, data:dict, user=None):
 
 
 
-async def run_concurrent_tasks(tasks, progress_details=None):
+async def run_concurrent_tasks(tasks, progress_details=None, pipeline=None):
     """
     Args:
         tasks: (list) async functions to be run
         progress_details: details for progress message (dict)
+        pipeline: UploadPipeline fed with each finished task, in task order (optional)
     """
     semaphore = asyncio.Semaphore(Config.MAX_WORKERS)
 
     i = [0]
     l = len(tasks)
-    async def sem_task(task):
-        async with semaphore:
-            result = await task
+    async def sem_task(index, task):
+        try:
+            if pipeline:
+                # admit before taking a worker slot so the window cannot
+                # depend on the order the semaphore hands slots out
+                await pipeline.admit(index)
+            async with semaphore:
+                result = await task
+            if pipeline:
+                # start_track returns True only when the file is ready
+                await pipeline.put(index, result is True)
             if progress_details and result:
                 i[0]+=1 # currently done
                 await progress_message(i[0], l, progress_details)
+        finally:
+            # never-started coroutine of a cancelled sibling
+            task.close()
 
-    await asyncio.gather(*(sem_task(task) for task in tasks))
-
+    if pipeline:
+        pipeline.start()
+    runners = [asyncio.ensure_future(sem_task(index, task)) for index, task in enumerate(tasks)]
+    try:
+        await asyncio.gather(*runners)
+        if pipeline:
+            await pipeline.join()
+    except BaseException:
+        # gather does not cancel the siblings of a failed task
+        for runner in runners:
+            runner.cancel()
+        if pipeline:
+            pipeline.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        raise
 
 async def create_link(path, basepath):
     """
@@ -169,6 +157,13 @@ async def create_link(path, basepath):
 
 
 async def zip_handler(folderpath):
+    if Config.VIRTUAL_ZIP and bot_set.upload_mode != 'Local':
+        # Archives are streamed from the source files at upload time instead of written here
+        if bot_set.upload_mode == 'Telegram':
+            parts = await asyncio.to_thread(split_sources, folderpath, MAX_SIZE)
+            return [await plan_virtual_zip_async(zip_path, sources) for zip_path, sources in parts]
+        return await plan_virtual_zip_async(f"{folderpath}.zip", await asyncio.to_thread(scan_folder, folderpath))
+
     loop = asyncio.get_running_loop()
     with ThreadPoolExecutor() as pool:
         if bot_set.upload_mode == 'Telegram':
@@ -185,45 +180,11 @@ def split_zip_folder(folderpath) -> list:
     Returns:
         list of zip file paths
     """
-    zip_paths = []
-    part_num = 1
-    current_size = 0
-    current_files = []
-
-    def add_to_zip(zip_name, files_to_add):
-        if part_num == 1:
-            zip_path = f"{zip_name}.zip"
-        else:
-            zip_path = f"{zip_name}.part{part_num}.zip"
-
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path, arcname in files_to_add:
-                zipf.write(file_path, arcname)
-                os.remove(file_path)  # Delete the file after zipping
-        return zip_path
-
-    for root, dirs, files in os.walk(folderpath):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_size = os.path.getsize(file_path)
-            arcname = os.path.relpath(file_path, folderpath)
-
-            # If adding this file would exceed the max size, create a zip for the current files
-            if current_size + file_size > MAX_SIZE:
-                zip_paths.append(add_to_zip(folderpath, current_files))
-                part_num += 1
-                current_files = []  # Reset for the next zip part
-                current_size = 0
-
-            # Add the file to the current group
-            current_files.append((file_path, arcname))
-            current_size += file_size
-
-    # Create the final zip with any remaining files
-    if current_files:
-        zip_paths.append(add_to_zip(folderpath, current_files))
-
-    return zip_paths
+    # Delete the files after zipping
+    return [
+        write_zip(zip_path, sources, remove_sources=True)
+        for zip_path, sources in split_sources(folderpath, MAX_SIZE)
+    ]
 
 
 def zip_folder(folderpath) -> str:
@@ -234,16 +195,8 @@ def zip_folder(folderpath) -> str:
         str: The path to the created zip file.
     """
     zip_path = f"{folderpath}.zip"
-
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(folderpath):
-            for file in files:
-                file_path = os.path.join(root, file)
-                zipf.write(file_path, os.path.relpath(file_path, folderpath))
-                # Remove file after adding to the zip
-                os.remove(file_path)
-
-    return zip_path
+    # Source files are removed after adding to the zip
+    return write_zip(zip_path, scan_folder(folderpath), remove_sources=True)
 
 
 async def move_sorted_playlist(metadata, user) -> str:
@@ -382,9 +335,9 @@ async def cleanup(user=None, metadata=None, ):
             if is_zip:
                 if type(metadata['folderpath']) == list:
                     for i in metadata['folderpath']:
-                        os.remove(i)
+                        discard_zip(i)
                 else:
-                    os.remove(metadata['folderpath'])
+                    discard_zip(metadata['folderpath'])
             else:
                 shutil.rmtree(metadata['folderpath'])
         except FileNotFoundError:
@@ -0,0 +1,136 @@
+import os
+import time
+import shutil
+import asyncio
+import hashlib
+
+from typing import Awaitable, Callable, Dict, Optional
+
+from config import Config
+from bot.logger import LOGGER
+
+
+class MediaCache:
+    """
+    Size-bounded on-disk cache of downloaded tracks, shared by all users.
+
+    Entries are raw downloads (before tagging) stored under a hash of their
+    key (provider:id:quality, see file_cache.cache_key). A file's mtime is its
+    last use: entries unused for MEDIA_CACHE_TTL are dropped, and the least
+    recently used go first once the cache is over MEDIA_CACHE_SIZE.
+
+    obtain() is also a single-flight point: concurrent requests for the same
+    key (two users fetching the same album) wait for one download and then
+    copy its result instead of downloading it again.
+
+    Entries are full copies rather than hard links because callers tag their
+    file in place, which would rewrite the shared entry; that costs one extra
+    write per download, so the cache is off unless MEDIA_CACHE_SIZE is set.
+    """
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return Config.MEDIA_CACHE_SIZE > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(Config.MEDIA_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest())
+
+    async def _restore(self, key: str, dest: str) -> bool:
+        """Copy a fresh cache entry to `dest` (callers tag their copy in place)"""
+        src = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(src) > Config.MEDIA_CACHE_TTL:
+                return False
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            await asyncio.to_thread(shutil.copyfile, src, dest)
+            os.utime(src)
+            LOGGER.debug(f"Media cache hit for {key}")
+            return True
+        except OSError:
+            return False
+
+    async def _store(self, key: str, path: str):
+        dst = self._path(key)
+        tmp = dst + '.tmp'
+        try:
+            os.makedirs(Config.MEDIA_CACHE_DIR, exist_ok=True)
+            await asyncio.to_thread(shutil.copyfile, path, tmp)
+            os.replace(tmp, dst)
+        except OSError as e:
+            LOGGER.debug(f"Media cache store failed for {key}: {e}")
+            return
+        await self.evict()
+
+    async def obtain(self, key: Optional[str], dest: str, produce: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """
+        Make the file for `key` available at `dest`: from the cache, from a
+        download already running for the same key, or by awaiting `produce()`
+        which writes `dest` and returns an error string or None.
+        """
+        if not self.enabled or not key:
+            return await produce()
+        if await self._restore(key, dest):
+            return None
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            await asyncio.shield(pending)
+            if await self._restore(key, dest):
+                return None
+            # The shared download failed; try on our own
+            return await produce()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            err = await produce()
+            if not err and os.path.exists(dest):
+                await self._store(key, dest)
+            return err
+        finally:
+            del self._inflight[key]
+            future.set_result(None)
+
+    async def evict(self):
+        """Drop expired entries, then least recently used ones until under the size limit"""
+        async with self._lock:
+            await asyncio.to_thread(self._evict)
+
+    @staticmethod
+    def _evict():
+        now = time.time()
+        try:
+            entries = []
+            with os.scandir(Config.MEDIA_CACHE_DIR) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    if entry.name.endswith('.tmp'):
+                        # Left behind by a store that never finished
+                        if now - st.st_mtime > Config.MEDIA_CACHE_TTL:
+                            try:
+                                os.remove(entry.path)
+                            except OSError:
+                                pass
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            return
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if now - mtime <= Config.MEDIA_CACHE_TTL and total <= Config.MEDIA_CACHE_SIZE:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+# Singleton
+media_cache = MediaCache()
@@ -2,6 +2,8 @@ import os
 import asyncio
 import re
 
+from contextlib import nullcontext
+
 from pyrogram.types import Message
 from pyrogram.errors import MessageNotModified, FloodWait
 from pyrogram.enums import ParseMode
@@ -9,11 +11,19 @@ from pyrogram.enums import ParseMode
 from bot.tgclient import aio
 from bot.settings import bot_set
 from bot.logger import LOGGER
+from bot.helpers.governor import governor
+from bot.helpers.ratelimit import chat_limiter
+from bot.helpers import file_cache
+from bot.helpers.zipper import VirtualZip
+from config import Config
 
 import bot.helpers.translations as lang
 
 current_user = []
 
+# Attempts per message before giving up on FloodWait
+FLOOD_RETRIES = 5
+
 user_details = {
     'user_id': None,
     'name': None,
@@ -79,7 +89,7 @@ async def antiSpam(uid=None, cid=None, revoke=False) -> bool:
         return False
 
 
-async def send_message(user, item, itype='text', caption=None, markup=None, chat_id=None, meta=None, progress_reporter=None, progress_label=None, file_index=None, total_files=None, cancel_event: asyncio.Event | None = None):
+async def send_message(user, item, itype='text', caption=None, markup=None, chat_id=None, meta=None, progress_reporter=None, progress_label=None, file_index=None, total_files=None, cancel_event: asyncio.Event | None = None, cache_key=None):
     if not isinstance(user, dict):
         user = await fetch_user_details(user)
     chat_id = chat_id if chat_id else user['chat_id']
@@ -93,29 +103,40 @@ async def send_message(user, item, itype='text', caption=None, markup=None, chat
             if cancel_event and cancel_event.is_set():
                 raise RuntimeError("Cancelled")
             if progress_reporter:
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(progress_reporter.update_upload(current, total_bytes, file_index=index, file_total=total, label=label or 'Uploading'))
-                except Exception:
-                    pass
+                # Only records the numbers; the reporter's ticker decides when to edit
+                progress_reporter.on_upload_progress(current, total_bytes, file_index=index, file_total=total, label=label or 'Uploading')
         return _cb
 
+    # Media delivered before (same key or same bytes) is re-sent by file_id instead of uploaded again
+    digest = None
+    if itype in ('doc', 'audio', 'video') and isinstance(item, str):
+        file_id = file_cache.lookup(cache_key)
+        if not file_id and Config.FILE_ID_CACHE and os.path.exists(item):
+            # Hashing reads the whole file, so only do it when the key is absent or unknown
+            digest = await file_cache.content_hash(item)
+            file_id = file_cache.lookup(digest=digest)
+        if file_id:
+            msg = await send_message(user, file_id, 'cached', caption=caption, chat_id=chat_id)
+            if msg:
+                return msg
+            file_cache.forget(file_id)
+
     # Pre-stage update so users see "Uploading" immediately, and initialize totals
     if progress_reporter and itype in ('doc', 'audio', 'video'):
         try:
             await progress_reporter.set_stage(progress_label or 'Uploading')
-            if isinstance(item, str) and os.path.exists(item):
+            if isinstance(item, VirtualZip) or (isinstance(item, str) and os.path.exists(item)):
                 try:
-                    total_bytes = os.path.getsize(item)
+                    total_bytes = item.size if isinstance(item, VirtualZip) else os.path.getsize(item)
                     await progress_reporter.update_upload(0, total_bytes, file_index=file_index, file_total=total_files, label=progress_label or 'Uploading')
                 except Exception:
                     pass
         except Exception:
             pass
 
-    try:
+    async def _send():
         if itype == 'text':
-            msg = await aio.send_message(
+            return await aio.send_message(
                 chat_id=chat_id,
                 text=item,
                 reply_to_message_id=user['r_id'],
@@ -124,7 +145,7 @@ async def send_message(user, item, itype='text', caption=None, markup=None, chat
                 parse_mode=ParseMode.HTML
             )
         elif itype == 'doc':
-            msg = await aio.send_document(
+            return await aio.send_document(
                 chat_id=chat_id,
                 document=item,
                 caption=caption,
@@ -137,8 +158,8 @@ async def send_message(user, item, itype='text', caption=None, markup=None, chat
             artist = meta.get('artist', 'Unknown Artist') if meta else 'Unknown Artist'
             title = meta.get('title', 'Unknown Track') if meta else 'Unknown Track'
             thumbnail = meta.get('thumbnail') if meta else None
-            
-            msg = await aio.send_audio(
+        
+            return await aio.send_audio(
                 chat_id=chat_id,
                 audio=item,
                 caption=caption,
@@ -155,8 +176,8 @@ async def send_message(user, item, itype='text', caption=None, markup=None, chat
             width = int(meta.get('width', 1920)) if meta else 1920
             height = int(meta.get('height', 1080)) if meta else 1080
             thumbnail = meta.get('thumbnail') if meta else None
-            
-            msg = await aio.send_video(
+        
+            return await aio.send_video(
                 chat_id=chat_id,
                 video=item,
                 caption=caption,
@@ -168,35 +189,72 @@ async def send_message(user, item, itype='text', caption=None, markup=None, chat
                 progress=_make_progress_cb(progress_label, file_index, total_files) if progress_reporter else None
             )
         elif itype == 'pic':
-            msg = await aio.send_photo(
+            return await aio.send_photo(
                 chat_id=chat_id,
                 photo=item,
                 caption=caption,
                 reply_to_message_id=user['r_id']
             )
-    except FloodWait as e:
-        await asyncio.sleep(e.value)
-        return await send_message(user, item, itype, caption, markup, chat_id, meta, progress_reporter, progress_label, file_index, total_files, cancel_event)
-    except Exception as e:
-        LOGGER.error(f"Error sending message: {str(e)}")
+        elif itype == 'cached':
+            return await aio.send_cached_media(
+                chat_id=chat_id,
+                file_id=item,
+                caption=caption,
+                reply_to_message_id=user['r_id']
+            )
+
+    for attempt in range(1, FLOOD_RETRIES + 1):
+        await chat_limiter.wait(chat_id)
+        try:
+            # File uploads share the governor's upload slots; the slot is released before any FloodWait retry
+            slot = governor.slot('upload') if itype in ('doc', 'audio', 'video') else nullcontext()
+            async with slot:
+                msg = await _send()
+            chat_limiter.success(chat_id)
+            if digest or cache_key:
+                file_cache.remember(cache_key, digest, msg)
+        except FloodWait as e:
+            chat_limiter.flood(chat_id, e.value)
+            if attempt < FLOOD_RETRIES:
+                continue
+            LOGGER.error(f"Error sending message: still flood limited after {attempt} attempts")
+        except Exception as e:
+            LOGGER.error(f"Error sending message: {str(e)}")
+        break
     
     return msg
 
 
 async def edit_message(msg:Message, text, markup=None, antiflood=True):
-    try:
-        edited = await msg.edit_text(
-            text=text,
-            reply_markup=markup,
-            disable_web_page_preview=True,
-            parse_mode=ParseMode.HTML
-        )
-        return edited
-    except MessageNotModified:
-        return None
-    except FloodWait as e:
-        if antiflood:
-            await asyncio.sleep(e.value)
-            return await edit_message(msg, text, markup, antiflood)
-        else:
+    for attempt in range(1, FLOOD_RETRIES + 1):
+        try:
+            edited = await msg.edit_text(
+                text=text,
+                reply_markup=markup,
+                disable_web_page_preview=True,
+                parse_mode=ParseMode.HTML
+            )
+            return edited
+        except MessageNotModified:
             return None
+        except FloodWait as e:
+            chat_limiter.flood(msg.chat.id, e.value)
+            if not antiflood or attempt == FLOOD_RETRIES:
+                return None
+            await chat_limiter.wait(msg.chat.id)
+
+
+async def dispatch_uploads(jobs, concurrency=None):
+    """
+    Run upload coroutines with at most UPLOAD_CONCURRENCY in flight. Uploads
+    start in list order; with more than one in flight a small file may finish
+    (and appear in the chat) before a bigger one queued ahead of it.
+    Returns results in input order; exceptions are returned, not raised.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency or Config.UPLOAD_CONCURRENCY))
+
+    async def _run(job):
+        async with semaphore:
+            return await job
+
+    return await asyncio.gather(*(_run(job) for job in jobs), return_exceptions=True)
@@ -1,6 +1,5 @@
 import os
 
-from mutagen import File
 from config import Config
 from mutagen import flac, mp4
 from mutagen.mp3 import EasyMP3
@@ -9,6 +8,7 @@ from mutagen.id3 import TALB, TCOP, TDRC, TIT2, TPE1, TRCK, APIC, \
 
 from bot.logger import LOGGER
 from .utils import download_file
+from .tag_cache import tag_cache
 
 
 metadata = {
@@ -47,17 +47,21 @@ metadata = {
 async def set_metadata(metadata:dict):
     audio_path = metadata['filepath']
 
-    handle = File(audio_path)
+    handle = tag_cache.get(audio_path)
 
     if metadata['duration'] == '':
         metadata['duration'] = handle.info.length
 
-    if 'audio/x-flac' in handle.mime:
-        await set_flac(metadata, handle)
-    elif 'audio/mpeg' in handle.mime:
-        await set_mp3(metadata, handle)
-    elif 'audio/x-m4a' in handle.mime: 
-        await set_m4a(metadata, handle)
+    try:
+        if 'audio/x-flac' in handle.mime:
+            await set_flac(metadata, handle)
+        elif 'audio/mpeg' in handle.mime:
+            await set_mp3(metadata, handle)
+        elif 'audio/x-m4a' in handle.mime:
+            await set_m4a(metadata, handle)
+    finally:
+        # The cached handle was modified and the file rewritten
+        tag_cache.invalidate(audio_path)
 
 
 async def set_flac(data, handle):
@@ -152,7 +156,7 @@ async def savePic(handle, metadata):
 
 
 async def get_audio_extension(path):
-    handle = File(path)
+    handle = tag_cache.get(path)
     
     if 'audio/x-m4a' in handle.mime:
         return 'm4a'
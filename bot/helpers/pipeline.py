@@ -0,0 +1,77 @@
+import asyncio
+
+from typing import Any, Awaitable, Callable, Optional
+
+from config import Config
+from bot.logger import LOGGER
+
+
+class UploadPipeline:
+    """
+    Hands finished downloads of an album/playlist to a single uploader while
+    the remaining tracks are still downloading.
+
+    Items are uploaded strictly in list order so the chat keeps the tracklist
+    order; a track that finishes early waits for the ones before it. At most
+    `ahead` tracks may be admitted past the one currently awaiting upload,
+    which bounds the files sitting on disk when uploading is the slower side.
+    """
+    def __init__(self, items: list, upload: Callable[[Any], Awaitable[Any]], ahead: Optional[int] = None):
+        self.items = items
+        self._upload = upload
+        self._ahead = max(1, ahead or Config.UPLOAD_QUEUE_SIZE)
+        self._ready: dict[int, bool] = {}
+        self._next = 0
+        self._cond = asyncio.Condition()
+        self._consumer: Optional[asyncio.Task] = None
+        self._cancelled = False
+
+    def start(self):
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._run())
+
+    async def admit(self, index: int):
+        """Wait until item `index` is allowed to start downloading (back-pressure)"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._cancelled or index < self._next + self._ahead)
+            if self._cancelled:
+                raise asyncio.CancelledError
+
+    async def put(self, index: int, ok: bool):
+        """Report item `index` as downloaded (`ok`) or failed (skipped by the uploader)"""
+        async with self._cond:
+            self._ready[index] = ok
+            self._cond.notify_all()
+
+    async def _run(self):
+        while self._next < len(self.items):
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._next in self._ready)
+                ok = self._ready.pop(self._next)
+            if ok:
+                item = self.items[self._next]
+                try:
+                    await self._upload(item)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    LOGGER.error(f"Pipeline upload failed: {e}")
+            async with self._cond:
+                self._next += 1
+                self._cond.notify_all()
+
+    async def join(self):
+        """Wait for every reported item to be uploaded"""
+        if self._consumer is not None:
+            await self._consumer
+
+    def cancel(self):
+        """Stop uploading and make every task still waiting in admit() raise"""
+        self._cancelled = True
+        if self._consumer is not None and not self._consumer.done():
+            self._consumer.cancel()
+        asyncio.ensure_future(self._wake())
+
+    async def _wake(self):
+        async with self._cond:
+            self._cond.notify_all()
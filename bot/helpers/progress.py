@@ -5,10 +5,58 @@ import time
 from typing import Optional
 
 from bot.helpers.message import edit_message
+from bot.helpers.ratelimit import chat_limiter
+from bot.helpers.sysstats import system_stats, format_rate
 from bot.logger import LOGGER
 
 
+# Ticker exits after this long without updates and is restarted by the next one
+IDLE_TIMEOUT = 300.0
+# Weight of the newest sample in speed averages
+RATE_ALPHA = 0.3
+
+
+class _Rate:
+    """Smoothed units per second, fed with an absolute counter"""
+    def __init__(self):
+        self.value: float = 0.0
+        self._last: Optional[tuple] = None
+
+    def update(self, done: float):
+        now = time.monotonic()
+        if self._last is None or done < self._last[1]:
+            # First sample, or the counter restarted (next file)
+            self._last = (now, done)
+            return
+        elapsed = now - self._last[0]
+        if elapsed < 0.5:
+            return
+        sample = (done - self._last[1]) / elapsed
+        self.value = sample if not self.value else RATE_ALPHA * sample + (1 - RATE_ALPHA) * self.value
+        self._last = (now, done)
+
+    def eta(self, remaining: float) -> Optional[float]:
+        if self.value <= 0 or remaining <= 0:
+            return None
+        return remaining / self.value
+
+
+def _format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
 class ProgressReporter:
+    """
+    Progress message for one task. Update methods only change state and wake
+    a single background ticker, which renders and edits the message at most
+    once per `min_interval_seconds`; states in between are simply skipped, so
+    frequent callbacks (upload ticks, per-chunk downloads) cost almost nothing.
+    """
     def __init__(self, msg, label: str = "Apple Music", min_interval_seconds: float = 2.0, show_system_stats: bool = True):
         self.msg = msg
         self.label = label
@@ -18,8 +66,12 @@ class ProgressReporter:
         self.tracks_done: int = 0
         self.tracks_total: Optional[int] = None
 
+        self.process_done: int = 0
+        self.process_total: int = 0
+
         self.zip_done: int = 0
         self.zip_total: int = 0
+        self.zip_bytes: bool = False  # zip progress counts bytes instead of files
 
         self.upload_current: int = 0
         self.upload_total: int = 0
@@ -28,8 +80,18 @@ class ProgressReporter:
 
         self._last_update: float = 0.0
         self._min_interval: float = min_interval_seconds
-        self._lock = asyncio.Lock()
         self._show_system_stats = show_system_stats
+        self._last_text: Optional[str] = None
+        self._download_rate = _Rate()  # percent per second
+        self._upload_rate = _Rate()  # bytes per second
+        self._wake: Optional[asyncio.Event] = None
+        self._ticker: Optional[asyncio.Task] = None
+        # Pyrogram runs sync progress callbacks in an executor thread; they are handed back to this loop
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._closed = False
 
     def _make_bar(self, percent: int) -> str:
         blocks = 10
@@ -39,50 +101,120 @@ class ProgressReporter:
 
     async def set_stage(self, stage: str):
         self.stage = stage
-        await self._maybe_update(force=True)
+        self._touch()
 
     async def set_total_tracks(self, total: int):
         if total is not None and total >= 0:
             self.tracks_total = int(total)
-        await self._maybe_update()
+        self._touch()
 
     async def update_download(self, percent: Optional[int] = None, tracks_done: Optional[int] = None):
         if percent is not None:
             self.download_percent = max(0, min(100, int(percent)))
+            self._download_rate.update(self.download_percent)
         if tracks_done is not None:
             self.tracks_done = max(0, int(tracks_done))
-        await self._maybe_update()
+        self._touch()
+
+    def on_process_progress(self, done: int, total: int):
+        """Files processed after download (metadata extraction)"""
+        self.stage = "Processing"
+        self.process_done = max(0, int(done))
+        self.process_total = max(0, int(total))
+        self._touch()
+
+    def on_download_progress(self, done: int, total: int):
+        """Synchronous byte-level download progress of a single file"""
+        self.stage = "Downloading"
+        if total:
+            self.download_percent = max(0, min(100, int(done * 100 / total)))
+            self._download_rate.update(self.download_percent)
+        self._touch()
 
     async def update_zip(self, done: int, total: int):
         self.zip_done = max(0, int(done))
         self.zip_total = max(0, int(total))
-        await self._maybe_update()
+        self.zip_bytes = False
+        self._touch()
+
+    def on_zip_progress(self, done: int, total: int):
+        """Synchronous byte-level zip progress (called on the loop by the zip writer)"""
+        self.zip_done = max(0, int(done))
+        self.zip_total = max(0, int(total))
+        self.zip_bytes = True
+        self._touch()
 
     async def update_upload(self, current: int, total: int, file_index: Optional[int] = None, file_total: Optional[int] = None, label: Optional[str] = None):
+        self.on_upload_progress(current, total, file_index, file_total, label)
+
+    def on_upload_progress(self, current: int, total: int, file_index: Optional[int] = None, file_total: Optional[int] = None, label: Optional[str] = None):
+        """Synchronous variant for Pyrogram progress callbacks"""
         self.upload_current = max(0, int(current))
         self.upload_total = max(0, int(total))
+        self._upload_rate.update(self.upload_current)
         if file_index is not None:
             self.file_index = int(file_index)
         if file_total is not None:
             self.file_total = int(file_total)
         if label:
             self.stage = label
-        await self._maybe_update()
+        self._touch()
 
     def should_update(self) -> bool:
         return (time.monotonic() - self._last_update) >= self._min_interval
 
-    async def _maybe_update(self, force: bool = False):
-        async with self._lock:
-            now = time.monotonic()
-            if not force and (now - self._last_update) < self._min_interval:
-                return
-            self._last_update = now
-            text = self._render()
+    def _touch(self):
+        """Mark the state changed and make sure the ticker is running"""
+        if self._closed:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is None or (self._loop is not None and running is not self._loop):
+            # Worker thread: asyncio.Event is not thread-safe, so continue on the reporter's loop
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._touch)
+            return
+        self._loop = running
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._wake.set()
+        if self._ticker is None or self._ticker.done():
+            self._ticker = running.create_task(self._tick())
+
+    async def _tick(self):
+        while not self._closed:
             try:
-                await edit_message(self.msg, text)
-            except Exception as e:
-                LOGGER.debug(f"Progress update skipped: {e}")
+                await asyncio.wait_for(self._wake.wait(), IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return
+            self._wake.clear()
+            await self._flush()
+            # Bounded rate: changes made meanwhile are coalesced into the next render
+            await asyncio.sleep(self._min_interval)
+
+    async def _flush(self):
+        text = self._render()
+        if text == self._last_text:
+            return
+        self._last_update = time.monotonic()
+        try:
+            await chat_limiter.wait(self.msg.chat.id)
+            if await edit_message(self.msg, text, antiflood=False):
+                self._last_text = text
+        except Exception as e:
+            LOGGER.debug(f"Progress update skipped: {e}")
+
+    async def close(self, render: bool = True):
+        """Stop the ticker and, unless `render` is False, render the final state once"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._ticker and not self._ticker.done():
+            self._ticker.cancel()
+        if render:
+            await self._flush()
 
     def _render(self) -> str:
         lines = []
@@ -97,22 +229,15 @@ class ProgressReporter:
         }
         lines.append(f"{stage_emoji.get(self.stage, '🔄')} {self.label} • {self.stage}")
 
-        # Optional system stats line
-        if self._show_system_stats:
-            try:
-                import psutil, shutil, os
-                cpu = psutil.cpu_percent(interval=None)
-                mem = psutil.virtual_memory()
-                mem_used = int(mem.used / (1024**3))
-                mem_total = int(mem.total / (1024**3))
-                # Choose storage path; fallback to current cwd
-                base = os.getenv("LOCAL_STORAGE") or os.getcwd()
-                du = shutil.disk_usage(base)
-                disk_used = int(du.used / (1024**3))
-                disk_total = int(du.total / (1024**3))
-                lines.append(f"🖥️ CPU {cpu}% • RAM {mem_used}/{mem_total} GB • Disk {disk_used}/{disk_total} GB")
-            except Exception:
-                pass
+        # Optional system stats line, from the shared background sampler
+        if self._show_system_stats and system_stats.snapshot:
+            st = system_stats.snapshot
+            gb = 1024 ** 3
+            lines.append(
+                f"🖥️ CPU {st['cpu']}% • RAM {int(st['mem_used'] / gb)}/{int(st['mem_total'] / gb)} GB"
+                f" • Disk {int(st['disk_used'] / gb)}/{int(st['disk_total'] / gb)} GB"
+            )
+            lines.append(f"🌐 ↓ {format_rate(st['net_down'])} • ↑ {format_rate(st['net_up'])}")
 
         # Download section
         if self.stage in ("Downloading", "Processing") or self.download_percent > 0 or self.tracks_done > 0:
@@ -121,19 +246,34 @@ class ProgressReporter:
                 tracks = f"{self.tracks_done}/{self.tracks_total}"
             else:
                 tracks = f"{self.tracks_done}"
-            lines.append(f"🎶 {bar} {self.download_percent}%  •  Tracks: {tracks}")
+            line = f"🎶 {bar} {self.download_percent}%  •  Tracks: {tracks}"
+            if 0 < self.download_percent < 100:
+                line += f"  •  ETA {_format_eta(self._download_rate.eta(100 - self.download_percent))}"
+            lines.append(line)
+
+        # Processing section
+        if self.stage == "Processing" and self.process_total:
+            lines.append(f"🛠️ Files: {self.process_done}/{self.process_total}")
 
         # Zip section
         if self.zip_total:
             percent = int((self.zip_done / self.zip_total) * 100) if self.zip_total else 0
             bar = self._make_bar(percent)
-            lines.append(f"🗜️ {bar} {percent}%  •  Files: {self.zip_done}/{self.zip_total}")
+            if self.zip_bytes:
+                mb = 1024 ** 2
+                lines.append(f"🗜️ {bar} {percent}%  •  {self.zip_done / mb:.0f}/{self.zip_total / mb:.0f} MB")
+            else:
+                lines.append(f"🗜️ {bar} {percent}%  •  Files: {self.zip_done}/{self.zip_total}")
 
         # Upload section
         if self.upload_total:
             percent = int((self.upload_current / self.upload_total) * 100) if self.upload_total else 0
             bar = self._make_bar(percent)
             idx = f" ({self.file_index}/{self.file_total})" if self.file_index and self.file_total else ""
-            lines.append(f"📤 {bar} {percent}%{idx}")
+            line = f"📤 {bar} {percent}%{idx}"
+            if self._upload_rate.value and self.upload_current < self.upload_total:
+                eta = self._upload_rate.eta(self.upload_total - self.upload_current)
+                line += f"  •  {format_rate(self._upload_rate.value)}  •  ETA {_format_eta(eta)}"
+            lines.append(line)
 
         return "\n".join(lines)
\ No newline at end of file
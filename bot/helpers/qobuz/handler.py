@@ -6,9 +6,12 @@ from pathvalidate import sanitize_filepath
 
 from ..legacy_utils import *
 from ..metadata import set_metadata
+from ..tasks import task_manager
 
 # FIXED IMPORT: Changed from ..uploder to ..uploader
-from ..legacy_uploader import track_upload, album_upload, artist_upload, playlist_upload
+from ..legacy_uploader import track_upload, album_upload, artist_upload, playlist_upload, upload_pipeline, send_cached_track
+from .. import file_cache
+from ..media_cache import media_cache
 
 
 async def start_qobuz(url:str, user:dict):
@@ -62,7 +65,9 @@ async def start_album(item_id:int, user:dict, upload=True, basefolder=None):
         'title': album_meta['title'],
         'type': album_meta['type']
     }
-    await run_concurrent_tasks(tasks, update_details)
+    # Telegram uploads start while the rest of the album downloads
+    pipeline = upload_pipeline(album_meta, user) if upload else None
+    await run_concurrent_tasks(tasks, update_details, pipeline)
 
     if bot_set.album_zip:
         await edit_message(user['bot_msg'], lang.s.ZIPPING)
@@ -87,6 +92,10 @@ async def start_track(item_id:int, user:dict, track_meta:dict | None, upload=Tru
     Returns:
         Acknowledgement (bool) when finished
     """
+    # Recovered queue job: skip tracks finished before the restart
+    checkpoint = f"qobuz:{item_id}"
+    if task_manager.track_done(user, checkpoint, track_meta, upload):
+        return True
 
     if not track_meta:
         track_meta, err = await get_track_metadata(item_id, user['r_id'])
@@ -108,20 +117,31 @@ async def start_track(item_id:int, user:dict, track_meta:dict | None, upload=Tru
 
     track_meta['extension'], track_meta['quality'] = await get_quality(raw_data)
 
+    track_meta['cache_key'] = file_cache.cache_key('qobuz', item_id, track_meta['quality'])
+    if upload and await send_cached_track(user, track_meta['cache_key']):
+        task_manager.save_checkpoint(user, checkpoint, uploaded=True)
+        return True
+
     # add filename to filepath
     filename = await format_string(Config.TRACK_NAME_FORMAT, track_meta, user)
     filepath += f"/{filename}.{track_meta['extension']}"
     filepath = sanitize_filepath(filepath)
     track_meta['filepath'] = filepath
 
-    err = await download_file(url, filepath, cancel_event=user.get('cancel_event'))
+    # Shared with concurrent requests for the same track and reused from the media cache
+    err = await media_cache.obtain(
+        track_meta['cache_key'], filepath,
+        lambda: download_file(url, filepath, cancel_event=user.get('cancel_event'), provider='qobuz')
+    )
     if err:
         return await send_message(user, err)
 
     await set_metadata(track_meta)
+    task_manager.save_checkpoint(user, checkpoint, track_meta['filepath'])
 
     if upload:
         await track_upload(track_meta, user, disable_link)
+        task_manager.save_checkpoint(user, checkpoint, uploaded=True)
 
     # Acknowledge task finished
     return True
@@ -187,7 +207,7 @@ async def start_playlist(tracks, playlist, user):
         tasks = []
         for track in play_meta['tracks']:
             tasks.append(start_track(track['itemid'], user, track, upload, playlist_folder))
-        await run_concurrent_tasks(tasks, update_details)
+        await run_concurrent_tasks(tasks, update_details, upload_pipeline(play_meta, user))
     else:
         i = 0
         if bot_set.playlist_zip: upload = False
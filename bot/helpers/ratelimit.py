@@ -0,0 +1,74 @@
+import time
+import asyncio
+
+from typing import Dict
+
+from bot.logger import LOGGER
+
+# Pacing between two sends to the same chat never grows beyond this (seconds)
+MAX_INTERVAL = 10.0
+# A FloodWait of N seconds spreads the next sends N / FLOOD_SPREAD seconds apart
+FLOOD_SPREAD = 10
+# Every successful send shrinks the interval by this factor until it reaches zero
+DECAY = 0.9
+
+
+class _ChatState:
+    __slots__ = ('interval', 'next_at', 'blocked_until')
+
+    def __init__(self):
+        self.interval = 0.0
+        self.next_at = 0.0
+        self.blocked_until = 0.0
+
+
+class ChatRateController:
+    """
+    Per-chat pacing for Telegram sends, learned from FloodWait.
+    Chats start unthrottled. A FloodWait blocks the chat for the requested time
+    and raises its send interval; successful sends let the interval decay back,
+    so a busy group settles near the rate Telegram accepts for it.
+    """
+    def __init__(self):
+        self._chats: Dict[int, _ChatState] = {}
+
+    def _state(self, chat_id: int) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = self._chats[chat_id] = _ChatState()
+        return state
+
+    async def wait(self, chat_id: int):
+        """Sleep until this chat may receive the next send and reserve that turn"""
+        state = self._state(chat_id)
+        now = time.monotonic()
+        at = max(now, state.next_at, state.blocked_until)
+        state.next_at = at + state.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    def flood(self, chat_id: int, seconds: float):
+        state = self._state(chat_id)
+        now = time.monotonic()
+        state.blocked_until = max(state.blocked_until, now + seconds)
+        state.interval = min(MAX_INTERVAL, max(state.interval * 2, seconds / FLOOD_SPREAD, 0.5))
+        LOGGER.debug(f"FloodWait {seconds}s in chat {chat_id}, send interval now {state.interval:.2f}s")
+
+    def success(self, chat_id: int):
+        state = self._chats.get(chat_id)
+        if state is None or not state.interval:
+            return
+        state.interval *= DECAY
+        if state.interval < 0.05:
+            state.interval = 0.0
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            chat_id: {'interval': round(s.interval, 2), 'blocked': round(max(0.0, s.blocked_until - now), 1)}
+            for chat_id, s in self._chats.items() if s.interval or s.blocked_until > now
+        }
+
+
+# Singleton
+chat_limiter = ChatRateController()
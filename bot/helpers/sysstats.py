@@ -0,0 +1,75 @@
+import os
+import time
+import shutil
+import asyncio
+
+from typing import Optional
+
+from config import Config
+from bot.logger import LOGGER
+
+
+class SystemStats:
+    """
+    Host stats sampled by one background task into a shared snapshot, so
+    progress messages read cached numbers instead of polling psutil on every
+    render. Network throughput is the difference between two samples.
+    """
+    def __init__(self):
+        self.snapshot: dict = {}
+        self._task: Optional[asyncio.Task] = None
+        self._net_prev: Optional[tuple] = None
+
+    def _sample(self) -> dict:
+        import psutil
+        now = time.monotonic()
+        mem = psutil.virtual_memory()
+        du = shutil.disk_usage(Config.LOCAL_STORAGE if os.path.isdir(Config.LOCAL_STORAGE) else os.getcwd())
+        net = psutil.net_io_counters()
+        down = up = 0.0
+        if self._net_prev:
+            t, recv, sent = self._net_prev
+            elapsed = max(now - t, 1e-6)
+            down = max(0.0, (net.bytes_recv - recv) / elapsed)
+            up = max(0.0, (net.bytes_sent - sent) / elapsed)
+        self._net_prev = (now, net.bytes_recv, net.bytes_sent)
+        return {
+            'cpu': psutil.cpu_percent(interval=None),
+            'mem_used': mem.used,
+            'mem_total': mem.total,
+            'disk_used': du.used,
+            'disk_total': du.total,
+            'net_down': down,
+            'net_up': up,
+            'time': now,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                # disk_usage can block on slow mounts
+                self.snapshot = await asyncio.to_thread(self._sample)
+            except Exception as e:
+                LOGGER.debug(f"System stats sample failed: {e}")
+            await asyncio.sleep(Config.SYSSTATS_INTERVAL)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def format_rate(value: float) -> str:
+    """Bytes per second as a short human string"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f"{value:.1f} {unit}/s" if unit != 'B' else f"{int(value)} B/s"
+        value /= 1024
+
+
+# Singleton
+system_stats = SystemStats()
@@ -0,0 +1,58 @@
+import os
+import threading
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import mutagen
+
+from config import Config
+
+
+class TagCache:
+    """
+    Parsed mutagen handles (tags, stream info and embedded pictures) of
+    recently used files, so one file is parsed once per job although the
+    extension probe, tagging and metadata extraction all need it.
+
+    An entry is only reused while the file's (dev, ino, size, mtime_ns) is
+    unchanged, so any rewrite makes it stale; code that writes tags also
+    calls invalidate(). The least recently used entries are dropped beyond
+    TAG_CACHE_SIZE. Metadata workers read it from threads, hence the lock.
+    """
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[tuple, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat_key(path: str) -> tuple:
+        st = os.stat(path)
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get(self, path: str) -> Optional[Any]:
+        """mutagen.File(path), parsed at most once while the file is unchanged"""
+        if Config.TAG_CACHE_SIZE <= 0:
+            return mutagen.File(path)
+        path = os.path.abspath(path)
+        key = self._stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        handle = mutagen.File(path)
+        with self._lock:
+            self._entries[path] = (key, handle)
+            self._entries.move_to_end(path)
+            while len(self._entries) > Config.TAG_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return handle
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+
+# Singleton
+tag_cache = TagCache()
@@ -1,8 +1,42 @@
+import os
+import time
+import heapq
 import asyncio
 import uuid
-from typing import Dict, Optional, List, Callable, Any, Tuple
+import itertools
+from collections import deque, defaultdict
+from typing import Dict, Optional, List, Callable, Any, Tuple, Deque
 
+from config import Config
 from bot.logger import LOGGER
+from bot.helpers.database.pg_impl import queue_jobs_db
+
+
+# Relative cost of a job by content type, used for shortest-job-first ordering
+JOB_COSTS = {
+    'track': 1,
+    'video': 2,
+    'album': 10,
+    'playlist': 25,
+    'artist': 200,
+}
+DEFAULT_JOB_COST = JOB_COSTS['album']
+# Weight of the newest sample in the per-type duration average
+DURATION_EMA_ALPHA = 0.3
+# User fields stored with a queued job; enough to rebuild the job after a restart
+PERSISTED_USER_FIELDS = ('user_id', 'name', 'user_name', 'r_id', 'chat_id', 'link')
+
+
+def _parse_caps(raw: str) -> Dict[str, int]:
+    """Parse 'apple:1,tidal_ng:1' into {'apple': 1, 'tidal_ng': 1}"""
+    caps = {}
+    for part in (raw or '').replace(' ', '').split(','):
+        if ':' not in part:
+            continue
+        name, _, value = part.partition(':')
+        if value.isdigit():
+            caps[name.lower()] = int(value)
+    return caps
 
 
 class TaskState:
@@ -22,10 +56,22 @@ class TaskManager:
     def __init__(self):
         self._tasks: Dict[str, TaskState] = {}
         self._lock = asyncio.Lock()
-        # Simple per-bot FIFO queue with metadata and cancel support
-        self._pending: List[Dict[str, Any]] = []  # each: {qid, user_id, link, options, job}
-        self._pending_event = asyncio.Event()
+        # Queue: one priority heap per user, users served round-robin by several workers.
+        # Heap entries are (priority, seq, item); item: {qid, user_id, link, options, provider, kind, cost, admin, job}
+        self._queues: Dict[int, List[Tuple[float, int, Dict[str, Any]]]] = {}
+        self._users: Deque[int] = deque()  # users with pending items, in serving order
+        self._admin_users: Deque[int] = deque()  # boosted lane, always checked first
+        self._seq = itertools.count()
+        self._pending_count = 0
+        self._active: Dict[str, Tuple[str, float]] = {}  # qid -> (kind, started_at)
+        self._durations: Dict[str, float] = {}  # kind -> EMA of job duration in seconds
+        self._running: Dict[str, int] = defaultdict(int)  # running jobs per provider
+        self._caps: Dict[str, int] = _parse_caps(Config.QUEUE_PROVIDER_CAPS)
+        self._cond = asyncio.Condition(self._lock)
+        self._workers: List[asyncio.Task] = []
         self._worker_started = False
+        self._stopping = False
+        self._checkpoints: Dict[str, Dict[str, Any]] = {}  # qid -> {item key: record}
 
     async def create(self, user: dict, label: str) -> TaskState:
         async with self._lock:
@@ -109,61 +155,237 @@ class TaskManager:
         return {tid: st for tid, st in self._tasks.items() if st.user_id == user_id}
 
     # --- Queue support ---
+    def _can_run(self, provider: Optional[str]) -> bool:
+        cap = self._caps.get(provider or '')
+        return cap is None or self._running[provider] < cap
+
+    def _priority(self, cost: int, enqueued_at: float) -> float:
+        """
+        Shortest-job-first with aging. The effective priority of a waiting job is
+        cost - rate * waited, which orders the same as cost + rate * enqueued_at,
+        so the key never has to be recomputed while it sits in the heap.
+        `enqueued_at` is wall-clock time so restored jobs keep the age they had.
+        """
+        return cost + Config.QUEUE_AGING_RATE * enqueued_at
+
+    def _lane(self, user_id: int) -> Deque[int]:
+        # Boost is per user: every job an admin queues carries the flag
+        heap = self._queues[user_id]
+        return self._admin_users if heap[0][2].get('admin') else self._users
+
+    def _take_from(self, lane: Deque[int]) -> Optional[Dict[str, Any]]:
+        for _ in range(len(lane)):
+            user_id = lane[0]
+            lane.rotate(-1)
+            heap = self._queues[user_id]
+            if not self._can_run(heap[0][2].get('provider')):
+                continue
+            item = heapq.heappop(heap)[2]
+            if not heap:
+                # Just rotated to the back
+                lane.pop()
+                del self._queues[user_id]
+            self._pending_count -= 1
+            return item
+        return None
+
+    def _next_item(self) -> Optional[Dict[str, Any]]:
+        """
+        Pick the next job (lock held). Admin-boosted jobs go first; otherwise users
+        are served round-robin and each user's cheapest (aged) job runs next. A user
+        whose next job's provider is at its cap is skipped this round instead of
+        blocking everyone behind them.
+        """
+        return self._take_from(self._admin_users) or self._take_from(self._users)
+
+    def _estimate_duration(self, kind: Optional[str], cost: int) -> float:
+        if kind in self._durations:
+            return self._durations[kind]
+        return cost * Config.QUEUE_SECONDS_PER_COST
+
+    def _record_duration(self, kind: Optional[str], seconds: float):
+        if not kind:
+            return
+        previous = self._durations.get(kind)
+        if previous is None:
+            self._durations[kind] = seconds
+        else:
+            self._durations[kind] = DURATION_EMA_ALPHA * seconds + (1 - DURATION_EMA_ALPHA) * previous
+
+    def _estimate_wait(self, qid: str) -> float:
+        """Rough seconds until `qid` starts (lock held)"""
+        found = self._find(qid)
+        if found is None:
+            return 0.0
+
+        target = found[1]
+        item = target[2]
+        own = self._queues[item['user_id']]
+        ahead = [e for e in own if e < target]
+        rounds = len(ahead) + 1
+        # Round-robin: every other user gets about as many turns before ours comes up
+        for user_id, heap in self._queues.items():
+            if user_id == item['user_id']:
+                continue
+            others = heapq.nsmallest(rounds, heap)
+            if not item.get('admin'):
+                ahead.extend(others)
+            else:
+                ahead.extend(e for e in others if e[2].get('admin'))
+
+        now = time.monotonic()
+        work = sum(self._estimate_duration(e[2].get('kind'), e[2].get('cost', DEFAULT_JOB_COST)) for e in ahead)
+        for kind, started in self._active.values():
+            remaining = self._estimate_duration(kind, JOB_COSTS.get(kind, DEFAULT_JOB_COST)) - (now - started)
+            work += max(0.0, remaining)
+        return work / max(1, Config.QUEUE_WORKERS)
+
+    async def estimate_wait(self, qid: str) -> float:
+        """Estimated seconds before a queued job starts, from per-type average durations"""
+        async with self._lock:
+            return self._estimate_wait(qid)
+
+    @property
+    def stopping(self) -> bool:
+        """True while the bot shuts down (workers cancelled, jobs kept for restore)"""
+        return self._stopping
+
+    async def _worker_loop(self, index: int):
+        while not self._stopping:
+            async with self._cond:
+                item = self._next_item()
+                while item is None:
+                    await self._cond.wait()
+                    item = self._next_item()
+                provider = item.get('provider')
+                self._running[provider] += 1
+                started = time.monotonic()
+                self._active[item['qid']] = (item.get('kind'), started)
+            job = item.get('job')
+            try:
+                await job()
+            except Exception as e:
+                try:
+                    LOGGER.error(f"Queue job failed: {e}")
+                except Exception:
+                    pass
+            finally:
+                async with self._cond:
+                    self._running[provider] -= 1
+                    self._active.pop(item['qid'], None)
+                    self._record_duration(item.get('kind'), time.monotonic() - started)
+                    # A provider slot freed up; any idle worker may now find work
+                    self._cond.notify_all()
+            # A job interrupted by shutdown stays persisted and resumes on the next start
+            if not self._stopping:
+                self._forget(item['qid'])
+
     async def start_worker(self):
         if self._worker_started:
             return
         self._worker_started = True
+        workers = max(1, Config.QUEUE_WORKERS)
+        loop = asyncio.get_event_loop()
+        self._workers = [loop.create_task(self._worker_loop(i)) for i in range(workers)]
+        LOGGER.info(f"Queue: started {workers} worker(s), provider caps {self._caps or 'none'}")
 
-        async def _worker_loop():
-            while True:
-                await self._pending_event.wait()
-                item = None
-                async with self._lock:
-                    if self._pending:
-                        item = self._pending.pop(0)
-                    if not self._pending:
-                        self._pending_event.clear()
-                if not item:
-                    continue
-                job = item.get('job')
-                try:
-                    await job()
-                except Exception as e:
-                    try:
-                        LOGGER.error(f"Queue job failed: {e}")
-                    except Exception:
-                        pass
+    async def stop_workers(self):
+        """Stop taking jobs on shutdown; running jobs keep their persisted rows"""
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._worker_started = False
 
-        asyncio.get_event_loop().create_task(_worker_loop())
+    def _find(self, qid: str) -> Optional[Tuple[int, Tuple[float, int, Dict[str, Any]]]]:
+        for user_id, heap in self._queues.items():
+            for entry in heap:
+                if entry[2]['qid'] == qid:
+                    return user_id, entry
+        return None
 
-    async def enqueue(self, user_id: int, link: str, options: Dict[str, Any], job_coro_factory: Callable[[], Any]) -> Tuple[str, int]:
-        """Enqueue a job with metadata, return (queue_id, position)."""
-        async with self._lock:
-            qid = uuid.uuid4().hex[:8]
-            self._pending.append({
+    def _persist(self, item: Dict[str, Any], user: dict):
+        data = {k: user.get(k) for k in PERSISTED_USER_FIELDS}
+        try:
+            queue_jobs_db.add_job(item['qid'], item['user_id'], item['link'], item['options'], data,
+                                  item['provider'], item['kind'], item['admin'], item['enqueued_at'])
+        except Exception as e:
+            LOGGER.error(f"Queue: could not persist job {item['qid']}: {e}")
+
+    def _forget(self, qid: str):
+        self._checkpoints.pop(qid, None)
+        try:
+            queue_jobs_db.remove_job(qid)
+        except Exception as e:
+            LOGGER.error(f"Queue: could not remove persisted job {qid}: {e}")
+
+    async def enqueue(self, user_id: int, link: str, options: Dict[str, Any], job_coro_factory: Callable[[], Any],
+                      provider: Optional[str] = None, kind: Optional[str] = None, admin: bool = False,
+                      user: Optional[dict] = None, qid: Optional[str] = None,
+                      enqueued_at: Optional[float] = None) -> Tuple[str, int]:
+        """
+        Enqueue a job with metadata, return (queue_id, position in the user's queue).
+        `kind` (track/album/playlist/artist/video) sets the estimated cost;
+        `admin` puts the job in the boosted lane.
+        When `user` is given the job is persisted until it finishes and
+        user['qid'] is set so the job can record checkpoints. Passing an
+        existing `qid` (recovery) is idempotent: a job already queued or
+        running under that id is not added twice; recovery also passes the
+        job's original `enqueued_at` so it keeps its place.
+        """
+        async with self._cond:
+            if qid is not None:
+                if qid in self._active:
+                    return qid, 0
+                found = self._find(qid)
+                if found:
+                    heap = self._queues[found[0]]
+                    return qid, sum(1 for e in heap if e <= found[1])
+            else:
+                qid = uuid.uuid4().hex[:8]
+            cost = JOB_COSTS.get(kind, DEFAULT_JOB_COST)
+            item = {
                 'qid': qid,
                 'user_id': user_id,
                 'link': link,
                 'options': options or {},
+                'provider': provider,
+                'kind': kind,
+                'cost': cost,
+                'admin': admin,
+                'enqueued_at': enqueued_at or time.time(),
                 'job': job_coro_factory,
-            })
-            self._pending_event.set()
-            position = len(self._pending)
-            # Ensure worker is running on first enqueue
-            await self.start_worker()
-            return qid, position
+            }
+            entry = (self._priority(cost, item['enqueued_at']), next(self._seq), item)
+            heap = self._queues.get(user_id)
+            if heap is None:
+                heap = self._queues[user_id] = []
+            heapq.heappush(heap, entry)
+            if len(heap) == 1:
+                self._lane(user_id).append(user_id)
+            self._pending_count += 1
+            position = sum(1 for e in heap if e <= entry)
+            if user is not None:
+                user['qid'] = qid
+                self._persist(item, user)
+            self._cond.notify()
+        # Ensure workers are running on first enqueue
+        await self.start_worker()
+        return qid, position
 
     async def queue_size(self, user_id: Optional[int] = None) -> int:
         async with self._lock:
             if user_id is None:
-                return len(self._pending)
-            return sum(1 for it in self._pending if it.get('user_id') == user_id)
+                return self._pending_count
+            return len(self._queues.get(user_id, ()))
 
     async def list_pending(self, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
         async with self._lock:
-            items = list(self._pending)
-        if user_id is not None:
-            items = [it for it in items if it.get('user_id') == user_id]
+            if user_id is not None:
+                items = [dict(e[2]) for e in sorted(self._queues.get(user_id, ()))]
+            else:
+                users = list(self._admin_users) + list(self._users)
+                items = [dict(e[2]) for uid in users for e in sorted(self._queues[uid])]
         # annotate position
         for idx, it in enumerate(items, start=1):
             it['position'] = idx
@@ -171,14 +393,93 @@ class TaskManager:
 
     async def cancel_pending(self, qid: str, user_id: Optional[int] = None) -> bool:
         async with self._lock:
-            for i, it in enumerate(self._pending):
-                if it.get('qid') == qid and (user_id is None or it.get('user_id') == user_id):
-                    del self._pending[i]
-                    if not self._pending:
-                        self._pending_event.clear()
-                    return True
+            users = [user_id] if user_id is not None else list(self._queues)
+            for uid in users:
+                heap = self._queues.get(uid)
+                if not heap:
+                    continue
+                for i, entry in enumerate(heap):
+                    if entry[2].get('qid') == qid:
+                        lane = self._lane(uid)
+                        heap.pop(i)
+                        heapq.heapify(heap)
+                        self._pending_count -= 1
+                        if not heap:
+                            lane.remove(uid)
+                            del self._queues[uid]
+                        self._forget(qid)
+                        return True
         return False
 
+    async def restore(self, job_builder: Callable[[dict, str, Dict[str, Any]], Callable[[], Any]]) -> int:
+        """
+        Re-queue jobs persisted before a restart, oldest first, under their
+        original ids. `job_builder(user, link, options)` returns the job
+        factory, like the one passed to enqueue.
+        """
+        try:
+            rows = queue_jobs_db.get_jobs()
+        except Exception as e:
+            LOGGER.error(f"Queue: could not load persisted jobs: {e}")
+            return 0
+        self._stopping = False
+        count = 0
+        for row in rows:
+            user = dict(row['user_data'] or {})
+            user['qid'] = row['qid']
+            self._checkpoints[row['qid']] = dict(row['checkpoints'] or {})
+            job = job_builder(user, row['link'], dict(row['options'] or {}))
+            await self.enqueue(row['user_id'], row['link'], row['options'] or {}, job,
+                               provider=row['provider'], kind=row['kind'], admin=row['admin'],
+                               qid=row['qid'], enqueued_at=row.get('enqueued_at'))
+            count += 1
+        if count:
+            LOGGER.info(f"Queue: restored {count} persisted job(s)")
+        return count
+
+    # --- Checkpoints: items of a queued job that already finished ---
+    def get_checkpoint(self, user: dict, key: str) -> Optional[Dict[str, Any]]:
+        qid = user.get('qid')
+        if not qid:
+            return None
+        return self._checkpoints.get(qid, {}).get(key)
+
+    def save_checkpoint(self, user: dict, key: str, filepath: Optional[str] = None, uploaded: bool = False):
+        """
+        Record that an item of the user's queued job is downloaded to `filepath`
+        or already uploaded. No-op outside Queue Mode.
+        """
+        qid = user.get('qid')
+        if not qid:
+            return
+        record = {'filepath': filepath, 'uploaded': uploaded}
+        self._checkpoints.setdefault(qid, {})[key] = record
+        try:
+            queue_jobs_db.save_checkpoint(qid, key, record)
+        except Exception as e:
+            LOGGER.debug(f"Queue: could not save checkpoint {key} for {qid}: {e}")
+
+    def track_done(self, user: dict, key: str, track_meta: Optional[dict], upload: bool) -> bool:
+        """
+        Whether a recovered job can skip this track: it was uploaded already, or
+        it only needs to be on disk and the earlier download is still there.
+        Restores the file path into `track_meta` for the later album upload, or
+        marks it `uploaded` so the upload paths skip it.
+        """
+        record = self.get_checkpoint(user, key)
+        if not record:
+            return False
+        if record.get('uploaded'):
+            if track_meta is not None:
+                track_meta['uploaded'] = True
+            return True
+        filepath = record.get('filepath')
+        if upload or track_meta is None or not filepath or not os.path.exists(filepath):
+            return False
+        track_meta['filepath'] = filepath
+        track_meta['extension'] = filepath.rsplit('.', 1)[-1]
+        return True
+
 
 # Singleton
-task_manager = TaskManager()
\ No newline at end of file
+task_manager = TaskManager()
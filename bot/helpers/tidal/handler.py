@@ -11,6 +11,9 @@ from ..legacy_utils import *
 from ..metadata import set_metadata, get_audio_extension
 from ..legacy_uploader import *
 from ..message import send_message
+from ..tasks import task_manager
+from .. import file_cache
+from ..media_cache import media_cache
 
 from ...settings import bot_set
 import bot.helpers.translations as lang
@@ -36,6 +39,11 @@ async def start_tidal(url:str, user:dict):
 
 async def start_track(track_id:int, user:dict, track_meta:dict | None, \
     upload=True, basefolder=None, session=None, quality=None, disable_link=False, disable_msg=False):
+    # Recovered queue job: skip tracks finished before the restart
+    checkpoint = f"tidal:{track_id}"
+    if task_manager.track_done(user, checkpoint, track_meta, upload):
+        return True
+
     if not track_meta:
         try:
             track_data = await tidalapi.get_track(track_id)
@@ -64,6 +72,11 @@ async def start_track(track_id:int, user:dict, track_meta:dict | None, \
 
         track_meta['quality'] = await get_quality(stream_data)
 
+        track_meta['cache_key'] = file_cache.cache_key('tidal', track_id, track_meta['quality'])
+        if upload and await send_cached_track(user, track_meta['cache_key']):
+            task_manager.save_checkpoint(user, checkpoint, uploaded=True)
+            return True
+
         if stream_data['manifestMimeType'] == 'application/dash+xml':
             manifest = base64.b64decode(stream_data['manifest'])
             urls, track_codec = parse_mpd(manifest)
@@ -81,21 +94,25 @@ async def start_track(track_id:int, user:dict, track_meta:dict | None, \
         track_meta['filepath'] = filepath
 
 
-        if type(urls) == list:
-            i = 0   # flawless
-            temp_files = []
-            for url in urls[0]:
-                temp_path = f"{filepath}.{i}"
-                err = await download_file(url, temp_path, cancel_event=user.get('cancel_event'))
-                if err:
-                    return await send_message(user, err)
-                i+=1
-                temp_files.append(temp_path)
-            await merge_tracks(temp_files, filepath)
-        else:
-            err = await download_file(urls, filepath, cancel_event=user.get('cancel_event'))
-            if err:
-                return await send_message(user, err)
+        async def _download():
+            if type(urls) == list:
+                i = 0   # flawless
+                temp_files = []
+                for url in urls[0]:
+                    temp_path = f"{filepath}.{i}"
+                    err = await download_file(url, temp_path, cancel_event=user.get('cancel_event'), provider='tidal')
+                    if err:
+                        return err
+                    i+=1
+                    temp_files.append(temp_path)
+                await merge_tracks(temp_files, filepath)
+            else:
+                return await download_file(urls, filepath, cancel_event=user.get('cancel_event'), provider='tidal')
+
+        # Shared with concurrent requests for the same track and reused from the media cache
+        err = await media_cache.obtain(track_meta['cache_key'], filepath, _download)
+        if err:
+            return await send_message(user, err)
 
         track_meta['extension'] = await get_audio_extension(filepath)
 
@@ -109,9 +126,11 @@ async def start_track(track_id:int, user:dict, track_meta:dict | None, \
             os.rename(filepath, track_meta['filepath'])
 
         await set_metadata(track_meta)
+        task_manager.save_checkpoint(user, checkpoint, track_meta['filepath'])
 
         if upload:
             await track_upload(track_meta, user, False)
+            task_manager.save_checkpoint(user, checkpoint, uploaded=True)
 
     return True
 
@@ -157,7 +176,9 @@ async def start_album(album_id:int, user:dict, upload=True, basefolder=None):
         'title': album_meta['title'],
         'type': album_meta['type']
     }
-    await run_concurrent_tasks(tasks, update_details)
+    # Telegram uploads start while the rest of the album downloads
+    pipeline = upload_pipeline(album_meta, user) if upload else None
+    await run_concurrent_tasks(tasks, update_details, pipeline)
 
     if bot_set.album_zip:
         await edit_message(user['bot_msg'], lang.s.ZIPPING)
@@ -4,11 +4,13 @@ import asyncio
 import shutil
 from config import Config
 from ..message import edit_message, send_message
+from ..governor import governor
 from bot.logger import LOGGER
 from ..database.pg_impl import user_set_db, download_history
 from bot.helpers.utils import (
     extract_audio_metadata,
     extract_video_metadata,
+    extract_many,
 )
 from bot.helpers.uploader import track_upload, album_upload, playlist_upload, music_video_upload
 import re
@@ -113,9 +115,10 @@ async def start_tidal_ng(link: str, user: dict, options: dict = None):
         # --- Execute Download ---
         await edit_message(bot_msg, "🚀 Starting Tidal NG download...")
         cmd = ["python", TIDAL_DL_NG_CLI_PATH, "dl", link]
-        process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        await asyncio.gather(log_progress(process.stdout, bot_msg, user), log_progress(process.stderr, bot_msg, user))
-        await process.wait()
+        async with governor.slot('tidal_ng'):
+            process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            await asyncio.gather(log_progress(process.stdout, bot_msg, user), log_progress(process.stderr, bot_msg, user))
+            await process.wait()
 
         # --- DIAGNOSTIC LOGGING ---
         LOGGER.info(f"Tidal-NG: Download process finished. Checking for files in path: {final_download_path}")
@@ -147,18 +150,19 @@ async def start_tidal_ng(link: str, user: dict, options: dict = None):
         if not downloaded_files:
             raise Exception("No files were downloaded.")
 
+        async def _extract(file_path):
+            if file_path.lower().endswith(('.mp4', '.m4v')):
+                return await extract_video_metadata(file_path)
+            return await extract_audio_metadata(file_path)
+
         items = []
-        for file_path in downloaded_files:
-            try:
-                if file_path.lower().endswith(('.mp4', '.m4v')):
-                    metadata = await extract_video_metadata(file_path)
-                else:
-                    metadata = await extract_audio_metadata(file_path)
-                metadata['filepath'] = file_path
-                metadata['provider'] = 'Tidal NG'
-                items.append(metadata)
-            except Exception as e:
-                LOGGER.error(f"Metadata extraction failed for {file_path}: {str(e)}")
+        async for file_path, metadata in extract_many(downloaded_files, _extract, progress=user.get('progress')):
+            metadata['filepath'] = file_path
+            metadata['provider'] = 'Tidal NG'
+            items.append(metadata)
+        # Keep the walk order
+        order = {file_path: i for i, file_path in enumerate(downloaded_files)}
+        items.sort(key=lambda item: order[item['filepath']])
 
         if not items:
             raise Exception("Metadata extraction failed for all downloaded files.")
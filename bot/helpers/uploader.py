@@ -27,6 +27,8 @@ from bot.settings import bot_set
 from bot.helpers.progress import ProgressReporter
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from ..helpers.state import conversation_state
+from ..helpers.governor import governor
+from ..helpers.zipper import discard_zip
 
 def _get_provider_base_path(user_id: int, path: str) -> str:
     """Determines the base path for rclone uploads based on the provider."""
@@ -219,7 +221,7 @@ async def album_upload(metadata, user):
                 )
                 # Clean up zip file after upload
                 try:
-                    os.remove(zp)
+                    discard_zip(zp)
                 except Exception:
                     pass
         else:
@@ -301,7 +303,7 @@ async def artist_upload(metadata, user):
                     total_files=total_parts
                 )
                 try:
-                    os.remove(zp)
+                    discard_zip(zp)
                 except Exception:
                     pass
         else:
@@ -384,7 +386,7 @@ async def playlist_upload(metadata, user):
                     total_files=total_parts
                 )
                 try:
-                    os.remove(zp)
+                    discard_zip(zp)
                 except Exception:
                     pass
         else:
@@ -481,12 +483,13 @@ async def rclone_upload(user, path, base_path):
 
     # 1) Copy source to remote destination
     copy_cmd = f'rclone copy --config ./rclone.conf "{source_for_copy}" "{dest_path}"'
-    copy_task = await asyncio.create_subprocess_shell(
-        copy_cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    copy_stdout, copy_stderr = await copy_task.communicate()
+    async with governor.slot('upload'):
+        copy_task = await asyncio.create_subprocess_shell(
+            copy_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        copy_stdout, copy_stderr = await copy_task.communicate()
     if copy_task.returncode != 0:
         try:
             LOGGER.debug(f"Rclone copy failed: {copy_stderr.decode().strip()}")
@@ -1,23 +1,26 @@
 import os
 import math
-import aiohttp
 import asyncio
 import shutil
-import zipfile
 import re
 import subprocess
 import json
 import base64
 import time
 import mutagen
-from mutagen.mp4 import MP4
 from pathlib import Path
 from urllib.parse import quote
-from aiohttp import ClientTimeout
 from concurrent.futures import ThreadPoolExecutor
 from pyrogram.errors import FloodWait
 from typing import Optional
 from .progress import ProgressReporter
+from .downloader import fetch_file
+from .governor import governor
+from .apple_output import AppleOutputParser, LineSplitter
+from .tag_cache import tag_cache
+from .zipper import (
+    VirtualZip, discard_zip, plan_virtual_zip_async, scan_folder, split_sources, write_zip, write_zip_async
+)
 
 # Import Config for Apple Music settings
 from config import Config
@@ -30,56 +33,21 @@ from .message import send_message, edit_message
 
 MAX_SIZE = 1.9 * 1024 * 1024 * 1024  # 2GB
 
-async def download_file(url, path, retries=3, timeout=30, cancel_event: asyncio.Event | None = None):
+async def download_file(url, path, retries=3, timeout=30, cancel_event: asyncio.Event | None = None, provider: str | None = None):
     """
-    Download a file with retry logic, timeout, and cooperative cancellation
+    Download a file with retry logic, timeout, and cooperative cancellation.
+    Large files are fetched as parallel byte ranges when the server allows it.
     Args:
         url (str): URL to download
         path (str): Full path to save the file
         retries (int): Number of retry attempts
-        timeout (int): Timeout in seconds
+        timeout (int): Connect / idle-read timeout in seconds
         cancel_event: Optional asyncio.Event to signal cancellation
+        provider: Governor scope for concurrency/bandwidth limits
     Returns:
         str or None: Error message if failed, else None
     """
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    
-    for attempt in range(1, retries + 1):
-        try:
-            if cancel_event and cancel_event.is_set():
-                # Clean partial file if any
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                except Exception:
-                    pass
-                return "Cancelled"
-            async with aiohttp.ClientSession(timeout=ClientTimeout(total=timeout)) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        with open(path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(1024 * 4):
-                                if cancel_event and cancel_event.is_set():
-                                    try:
-                                        f.close()
-                                    except Exception:
-                                        pass
-                                    try:
-                                        if os.path.exists(path):
-                                            os.remove(path)
-                                    except Exception:
-                                        pass
-                                    return "Cancelled"
-                                f.write(chunk)
-                        return None
-                    else:
-                        return f"HTTP Status: {response.status}"
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if attempt == retries:
-                return f"Failed after {retries} attempts: {str(e)}"
-            await asyncio.sleep(2 ** attempt)
-        except Exception as e:
-            return f"Unexpected error: {str(e)}"
+    return await fetch_file(url, path, retries, timeout, cancel_event, provider)
 
 
 async def format_string(text:str, data:dict, user=None):
@@ -123,12 +91,13 @@ async def format_string(text:str, data:dict, user=None):
     return text
 
 
-async def run_concurrent_tasks(tasks, progress_details=None):
+async def run_concurrent_tasks(tasks, progress_details=None, pipeline=None):
     """
     Run tasks concurrently with progress tracking
     Args:
         tasks: List of async tasks
         progress_details: Progress message details
+        pipeline: UploadPipeline fed with each finished task, in task order (optional)
     Returns:
         Results of all tasks
     """
@@ -136,10 +105,18 @@ async def run_concurrent_tasks(tasks, progress_details=None):
     completed = 0
     total = len(tasks)
     
-    async def run_task(task):
+    async def run_task(index, task):
         nonlocal completed
-        async with semaphore:
-            result = await task
+        try:
+            if pipeline:
+                # admit before taking a worker slot so the window cannot
+                # depend on the order the semaphore hands slots out
+                await pipeline.admit(index)
+            async with semaphore:
+                result = await task
+            if pipeline:
+                # start_track returns True only when the file is ready
+                await pipeline.put(index, result is True)
             completed += 1
             if progress_details:
                 progress = int((completed / total) * 100)
@@ -151,8 +128,26 @@ async def run_concurrent_tasks(tasks, progress_details=None):
                 except FloodWait:
                     pass
             return result
-            
-    return await asyncio.gather(*(run_task(task) for task in tasks))
+        finally:
+            # never-started coroutine of a cancelled sibling
+            task.close()
+
+    if pipeline:
+        pipeline.start()
+    runners = [asyncio.ensure_future(run_task(index, task)) for index, task in enumerate(tasks)]
+    try:
+        results = await asyncio.gather(*runners)
+        if pipeline:
+            await pipeline.join()
+    except BaseException:
+        # gather does not cancel the siblings of a failed task
+        for runner in runners:
+            runner.cancel()
+        if pipeline:
+            pipeline.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        raise
+    return results
 
 
 async def create_link(path, basepath):
@@ -198,8 +193,15 @@ async def zip_handler(folderpath):
     Args:
         folderpath: Path to folder
     Returns:
-        List of zip paths
+        List of zip paths (Telegram) or a zip path; VirtualZip objects instead when VIRTUAL_ZIP is on
     """
+    if Config.VIRTUAL_ZIP and bot_set.upload_mode != 'Local':
+        # Archives are streamed from the source files at upload time instead of written here
+        if bot_set.upload_mode == 'Telegram':
+            parts = await asyncio.to_thread(split_sources, folderpath, MAX_SIZE)
+            return [await plan_virtual_zip_async(zip_path, sources) for zip_path, sources in parts]
+        return await plan_virtual_zip_async(f"{folderpath}.zip", await asyncio.to_thread(scan_folder, folderpath))
+
     loop = asyncio.get_running_loop()
     with ThreadPoolExecutor() as pool:
         if bot_set.upload_mode == 'Telegram':
@@ -217,46 +219,11 @@ def split_zip_folder(folderpath) -> list:
     Returns:
         List of zip file paths
     """
-    zip_paths = []
-    part_num = 1
-    current_size = 0
-    current_files = []
-
-    def add_to_zip(zip_name, files_to_add):
-        nonlocal part_num
-        if part_num == 1:
-            zip_path = f"{zip_name}.zip"
-        else:
-            zip_path = f"{zip_name}.part{part_num}.zip"
-
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path, arcname in files_to_add:
-                zipf.write(file_path, arcname)
-                os.remove(file_path)  # Delete after zipping
-        return zip_path
-
-    for root, dirs, files in os.walk(folderpath):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_size = os.path.getsize(file_path)
-            arcname = os.path.relpath(file_path, folderpath)
-
-            # Start new zip if adding would exceed max size
-            if current_size + file_size > MAX_SIZE:
-                zip_paths.append(add_to_zip(folderpath, current_files))
-                part_num += 1
-                current_files = []
-                current_size = 0
-
-            # Add to current group
-            current_files.append((file_path, arcname))
-            current_size += file_size
-
-    # Create final zip with remaining files
-    if current_files:
-        zip_paths.append(add_to_zip(folderpath, current_files))
-
-    return zip_paths
+    # Files are deleted once zipped
+    return [
+        write_zip(zip_path, sources, remove_sources=True)
+        for zip_path, sources in split_sources(folderpath, MAX_SIZE)
+    ]
 
 
 def zip_folder(folderpath) -> str:
@@ -268,15 +235,7 @@ def zip_folder(folderpath) -> str:
         Path to zip file
     """
     zip_path = f"{folderpath}.zip"
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(folderpath):
-            for file in files:
-                file_path = os.path.join(root, file)
-                zipf.write(file_path, os.path.relpath(file_path, folderpath))
-                os.remove(file_path)
-    
-    return zip_path
+    return write_zip(zip_path, scan_folder(folderpath), remove_sources=True)
 
 
 async def move_sorted_playlist(metadata, user) -> str:
@@ -421,7 +380,7 @@ async def cleanup(user=None, metadata=None):
     if metadata:
         try:
             # Apple Music specific cleanup
-            if "Apple Music" in metadata.get('folderpath', ''):
+            if isinstance(metadata.get('folderpath'), str) and "Apple Music" in metadata['folderpath']:
                 if os.path.exists(metadata['folderpath']):
                     shutil.rmtree(metadata['folderpath'], ignore_errors=True)
                 return
@@ -438,8 +397,7 @@ async def cleanup(user=None, metadata=None):
                 paths = metadata['folderpath'] if isinstance(metadata['folderpath'], list) else [metadata['folderpath']]
                 for path in paths:
                     try:
-                        if os.path.exists(path):
-                            os.remove(path)
+                        discard_zip(path)
                     except:
                         pass
             else:
@@ -496,134 +454,134 @@ async def run_apple_downloader(url: str, output_dir: str, options: list = None,
     Returns:
         dict: {'success': bool, 'error': str if failed}
     """
-    # Build command with options
-    cmd = [Config.DOWNLOADER_PATH]
-    if options:
-        cmd.extend(options)
-    cmd.append(url)
+    # One governor slot for the whole run: the downloader opens its own connections
+    async with governor.slot('apple'):
+        # Build command with options
+        cmd = [Config.DOWNLOADER_PATH]
+        if options:
+            cmd.extend(options)
+        cmd.append(url)
 
-    LOGGER.info(f"Running Apple downloader: {' '.join(cmd)}")
+        LOGGER.info(f"Running Apple downloader: {' '.join(cmd)}")
 
-    # Run the command
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
+        # Run the command
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
 
-    # Register subprocess for external cancellation
-    try:
-        if task_id:
-            from bot.helpers.tasks import task_manager
-            await task_manager.register_subprocess(task_id, process)
-    except Exception:
-        pass
-
-    # Read output in chunks to avoid buffer overrun
-    stdout_chunks = []
-    stage_set = False
-    while True:
-        # Early cancel check
-        if cancel_event and cancel_event.is_set():
-            try:
-                process.terminate()
-            except Exception:
-                pass
-            try:
-                await asyncio.wait_for(process.wait(), timeout=3)
-            except Exception:
+        # Register subprocess for external cancellation
+        try:
+            if task_id:
+                from bot.helpers.tasks import task_manager
+                await task_manager.register_subprocess(task_id, process)
+        except Exception:
+            pass
+
+        # stderr is drained concurrently so a chatty stderr can never block the process
+        err_parser = AppleOutputParser()
+
+        async def _drain_stderr():
+            splitter = LineSplitter()
+            while True:
+                chunk = await process.stderr.read(4096)
+                if not chunk:
+                    break
+                for line in splitter.feed(chunk):
+                    err_parser.tail.append(line)
+                    LOGGER.debug(f"Apple Downloader [stderr]: {line}")
+            for line in splitter.flush():
+                err_parser.tail.append(line)
+
+        stderr_task = asyncio.create_task(_drain_stderr())
+
+        # Parse stdout line by line as it arrives; only a bounded tail is kept
+        parser = AppleOutputParser()
+        splitter = LineSplitter()
+        stage_set = False
+
+        async def _handle(line):
+            nonlocal stage_set
+            LOGGER.debug(f"Apple Downloader: {line}")
+            for event, value in parser.feed(line):
                 try:
-                    process.kill()
+                    if progress:
+                        if event == 'total':
+                            await progress.set_total_tracks(value)
+                        elif event == 'done':
+                            await progress.update_download(tracks_done=value)
+                        elif event == 'percent':
+                            if not stage_set:
+                                await progress.set_stage("Downloading")
+                                stage_set = True
+                            await progress.update_download(percent=value)
+                    elif user and 'bot_msg' in user and event == 'percent':
+                        await edit_message(user['bot_msg'], f"Apple Music Download: {value}%", antiflood=False)
                 except Exception:
                     pass
-            return {'success': False, 'error': 'Cancelled'}
-        chunk = await process.stdout.read(4096)  # Read 4KB chunks
-        if not chunk:
-            break
-        stdout_chunks.append(chunk)
-
-        # Process chunk for progress updates
-        chunk_str = chunk.decode(errors='ignore')
-        if progress:
-            # Look for X/Y total pattern
-            try:
-                xy = re.search(r"(\d+)\s*/\s*(\d+)", chunk_str)
-                if xy:
-                    total = int(xy.group(2))
-                    await progress.set_total_tracks(total)
-            except Exception:
-                pass
-
-            # Look for percent
-            pct_match = re.search(r'(\d+)%', chunk_str)
-            if pct_match:
+
+        while True:
+            # Early cancel check
+            if cancel_event and cancel_event.is_set():
                 try:
-                    pct = int(pct_match.group(1))
-                    if not stage_set:
-                        await progress.set_stage("Downloading")
-                        stage_set = True
-                    await progress.update_download(percent=pct)
+                    process.terminate()
                 except Exception:
                     pass
-        elif user and 'bot_msg' in user:
-            progress_match = re.search(r'(\d+)%', chunk_str)
-            if progress_match:
                 try:
-                    pct = int(progress_match.group(1))
-                    await edit_message(
-                        user['bot_msg'],
-                        f"Apple Music Download: {pct}%"
-                    )
+                    await asyncio.wait_for(process.wait(), timeout=3)
                 except Exception:
-                    pass
+                    try:
+                        process.kill()
+                    except Exception:
+                        pass
+                stderr_task.cancel()
+                return {'success': False, 'error': 'Cancelled'}
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            for line in splitter.feed(chunk):
+                await _handle(line)
+        for line in splitter.flush():
+            await _handle(line)
 
-    # Combine all chunks
-    stdout_output = b''.join(stdout_chunks).decode(errors='ignore')
-    stdout_lines = stdout_output.splitlines()
+        await stderr_task
+        await process.wait()
+        stderr = err_parser.error_text().strip()
 
-    # Log all output lines
-    for line in stdout_lines:
-        LOGGER.debug(f"Apple Downloader: {line}")
+        # Clear subprocess registration
+        try:
+            if task_id:
+                from bot.helpers.tasks import task_manager
+                await task_manager.clear_subprocess(task_id)
+        except Exception:
+            pass
 
-    # Wait for process to finish
-    stderr = await process.stderr.read()
-    stderr = stderr.decode().strip()
+        # Move to processing stage
+        try:
+            if progress:
+                await progress.set_stage("Processing")
+        except Exception:
+            pass
 
-    # Clear subprocess registration
-    try:
-        if task_id:
-            from bot.helpers.tasks import task_manager
-            await task_manager.clear_subprocess(task_id)
-    except Exception:
-        pass
+        # Check return code
+        if process.returncode != 0:
+            error = stderr or parser.error_text()
+            LOGGER.error(f"Apple downloader failed: {error}")
+            return {'success': False, 'error': error}
 
-    # Move to processing stage
-    try:
-        if progress:
-            await progress.set_stage("Processing")
-    except Exception:
-        pass
+        return {'success': True}
 
-    # Check return code
-    if process.returncode != 0:
-        error = stderr or "\n".join(stdout_lines)
-        LOGGER.error(f"Apple downloader failed: {error}")
-        return {'success': False, 'error': error}
 
-    return {'success': True}
+# mutagen parsing and cover writes block; they run on this pool instead of the event loop
+_metadata_pool = ThreadPoolExecutor(max_workers=Config.METADATA_WORKERS, thread_name_prefix='metadata')
 
 
-async def extract_audio_metadata(file_path: str) -> dict:
-    """
-    Extract metadata from audio files
-    Args:
-        file_path: Path to audio file
-    Returns:
-        Metadata dictionary
-    """
+def _read_audio_metadata(file_path: str) -> dict:
+    """Blocking part of extract_audio_metadata"""
     try:
         if file_path.endswith('.m4a'):
-            audio = MP4(file_path)
+            audio = tag_cache.get(file_path)
             return {
                 'title': audio.get('\xa9nam', ['Unknown'])[0],
                 'artist': audio.get('\xa9ART', ['Unknown Artist'])[0],
@@ -633,7 +591,7 @@ async def extract_audio_metadata(file_path: str) -> dict:
             }
         else:
             # Handle other audio formats like mp3, flac, etc.
-            audio = mutagen.File(file_path)
+            audio = tag_cache.get(file_path)
             return {
                 'title': audio.get('title', ['Unknown'])[0],
                 'artist': audio.get('artist', ['Unknown Artist'])[0],
@@ -646,17 +604,11 @@ async def extract_audio_metadata(file_path: str) -> dict:
         return default_metadata(file_path)
 
 
-async def extract_video_metadata(file_path: str) -> dict:
-    """
-    Extract metadata from video files
-    Args:
-        file_path: Path to video file
-    Returns:
-        Metadata dictionary with video-specific properties
-    """
+def _read_video_metadata(file_path: str) -> dict:
+    """Blocking part of extract_video_metadata"""
     try:
         if file_path.endswith(('.mp4', '.m4v', '.mov')):
-            video = MP4(file_path)
+            video = tag_cache.get(file_path)
             return {
                 'title': video.get('\xa9nam', ['Unknown'])[0],
                 'artist': video.get('\xa9ART', ['Unknown Artist'])[0],
@@ -672,22 +624,16 @@ async def extract_video_metadata(file_path: str) -> dict:
         return default_metadata(file_path)
 
 
-async def extract_apple_metadata(file_path: str) -> dict:
-    """
-    Extract metadata from Apple Music files (audio or video)
-    Args:
-        file_path: Path to media file
-    Returns:
-        Metadata dictionary
-    """
+def _read_apple_metadata(file_path: str) -> dict:
+    """Blocking part of extract_apple_metadata"""
     try:
         if file_path.endswith('.m4a'):
-            return await extract_audio_metadata(file_path)
+            return _read_audio_metadata(file_path)
         elif file_path.endswith(('.mp4', '.m4v', '.mov')):
-            return await extract_video_metadata(file_path)
+            return _read_video_metadata(file_path)
         else:
             # Handle other file types with mutagen
-            audio = mutagen.File(file_path)
+            audio = tag_cache.get(file_path)
             return {
                 'title': audio.get('title', ['Unknown'])[0],
                 'artist': audio.get('artist', ['Unknown Artist'])[0],
@@ -700,6 +646,73 @@ async def extract_apple_metadata(file_path: str) -> dict:
         return default_metadata(file_path)
 
 
+async def extract_audio_metadata(file_path: str) -> dict:
+    """
+    Extract metadata from audio files
+    Args:
+        file_path: Path to audio file
+    Returns:
+        Metadata dictionary
+    """
+    return await asyncio.get_running_loop().run_in_executor(_metadata_pool, _read_audio_metadata, file_path)
+
+
+async def extract_video_metadata(file_path: str) -> dict:
+    """
+    Extract metadata from video files
+    Args:
+        file_path: Path to video file
+    Returns:
+        Metadata dictionary with video-specific properties
+    """
+    return await asyncio.get_running_loop().run_in_executor(_metadata_pool, _read_video_metadata, file_path)
+
+
+async def extract_apple_metadata(file_path: str) -> dict:
+    """
+    Extract metadata from Apple Music files (audio or video)
+    Args:
+        file_path: Path to media file
+    Returns:
+        Metadata dictionary
+    """
+    return await asyncio.get_running_loop().run_in_executor(_metadata_pool, _read_apple_metadata, file_path)
+
+
+async def extract_many(file_paths: list, extractor=extract_apple_metadata, progress: Optional[ProgressReporter] = None, concurrency: Optional[int] = None):
+    """
+    Extract metadata of many files at once, yielding (file_path, metadata) as each one completes.
+    Results arrive out of order; files that fail are logged and skipped.
+    Args:
+        file_paths: Paths of media files
+        extractor: One of the extract_*_metadata coroutines
+        progress: Optional ProgressReporter, updated after every file
+        concurrency: Files in flight at once (default METADATA_WORKERS)
+    """
+    semaphore = asyncio.Semaphore(concurrency or Config.METADATA_WORKERS)
+
+    async def _one(file_path):
+        async with semaphore:
+            try:
+                return file_path, await extractor(file_path)
+            except Exception as e:
+                LOGGER.error(f"Metadata extraction failed for {file_path}: {str(e)}")
+                return file_path, None
+
+    tasks = [asyncio.ensure_future(_one(file_path)) for file_path in file_paths]
+    try:
+        for done, future in enumerate(asyncio.as_completed(tasks), start=1):
+            file_path, metadata = await future
+            if progress:
+                progress.on_process_progress(done, len(tasks))
+            if metadata is not None:
+                yield file_path, metadata
+    finally:
+        # The consumer stopped early (error or cancel)
+        for task in tasks:
+            task.cancel()
+
+
 def extract_cover_art(media, file_path):
     """
     Extract cover art from audio/video file
@@ -755,7 +768,7 @@ def default_metadata(file_path):
     }
 
 
-async def create_apple_zip(directory: str, user_id: int, metadata: dict, progress: Optional[ProgressReporter] = None, cancel_event: asyncio.Event | None = None) -> str:
+async def create_apple_zip(directory: str, user_id: int, metadata: dict, progress: Optional[ProgressReporter] = None, cancel_event: asyncio.Event | None = None) -> str | VirtualZip:
     """
     Create zip file with descriptive name for downloads
     Args:
@@ -763,7 +776,7 @@ async def create_apple_zip(directory: str, user_id: int, metadata: dict, progres
         user_id: Telegram user ID
         metadata: Content metadata dictionary
     Returns:
-        Path to the created zip file
+        Path to the created zip file, or a VirtualZip when VIRTUAL_ZIP is on
     """
     # Determine content type and name
     content_type = metadata.get('type', 'album').capitalize()
@@ -804,38 +817,14 @@ async def create_apple_zip(directory: str, user_id: int, metadata: dict, progres
     # Initialize progress
     if progress:
         await progress.set_stage("Zipping")
-    
-    # Count total files to zip
-    total_files = 0
-    for root, _, files in os.walk(directory):
-        total_files += len(files)
-    if progress and total_files:
-        await progress.update_zip(0, total_files)
-    
-    # Create the zip file
-    done_files = 0
-    cancelled = False
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if cancel_event and cancel_event.is_set():
-                    cancelled = True
-                    break
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, directory)
-                zipf.write(file_path, arcname)
-                done_files += 1
-                if progress:
-                    await progress.update_zip(done_files, total_files)
-            if cancelled:
-                break
-    if cancelled:
-        try:
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-        except Exception:
-            pass
-        raise asyncio.CancelledError()
+
+    sources = scan_folder(directory)
+    if Config.VIRTUAL_ZIP:
+        # Nothing is written; the upload reads the archive straight from the source files
+        return await plan_virtual_zip_async(zip_path, sources, progress=progress, cancel_event=cancel_event)
+
+    # Built in a worker thread; progress is reported in bytes and a cancel removes the partial zip
+    await write_zip_async(zip_path, sources, progress=progress, cancel_event=cancel_event)
     
     LOGGER.info(f"Created descriptive zip: {zip_path}")
     return zip_path
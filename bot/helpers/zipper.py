@@ -0,0 +1,550 @@
+"""
+Zip writer tuned for music folders.
+
+Audio, video and images are already compressed, so they are written as
+STORED entries (no CPU spent for ~0% gain); anything else is sniffed and
+only deflated when a sample actually shrinks. Deflated entries (lyrics,
+playlists, NFO/JSON sidecars) are small and compressed in parallel worker
+threads before being written. The writer only appends to its output and
+tracks offsets itself, so it also works on pipes; Zip64 records are added
+when sizes or offsets pass 4 GiB.
+
+VirtualZip lays the same archive out in advance without writing it, so an
+album can be uploaded straight from its source files.
+"""
+import io
+import os
+import math
+import bisect
+import time
+import zlib
+import struct
+import asyncio
+
+from typing import BinaryIO, Callable, List, NamedTuple, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+
+STORED = 0
+DEFLATED = 8
+
+# Extensions that never compress meaningfully
+STORED_EXTENSIONS = {
+    '.flac', '.alac', '.m4a', '.mp3', '.aac', '.ogg', '.opus', '.wma', '.mka', '.ec3', '.ac3',
+    '.mp4', '.m4v', '.mkv', '.mov', '.webm', '.ts',
+    '.jpg', '.jpeg', '.png', '.webp', '.gif',
+    '.zip', '.7z', '.rar', '.gz', '.xz',
+}
+SNIFF_SIZE = 64 * 1024
+# Deflate only if the sniffed sample shrinks below this ratio
+SNIFF_RATIO = 0.9
+# Larger compressible files are stored rather than deflated in memory
+DEFLATE_MAX_SIZE = 16 * 1024 * 1024
+DEFLATE_WORKERS = 4
+CHUNK_SIZE = 1024 * 1024
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP16_LIMIT = 0xFFFF
+
+
+class ZipSource(NamedTuple):
+    path: str
+    arcname: str
+    size: int
+    mtime: float
+
+
+def scan_folder(folderpath: str) -> List[ZipSource]:
+    """All files under `folderpath` with their archive names, from one scandir walk"""
+    sources = []
+    stack = [folderpath]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    arcname = os.path.relpath(entry.path, folderpath).replace(os.sep, '/')
+                    sources.append(ZipSource(entry.path, arcname, st.st_size, st.st_mtime))
+    sources.sort(key=lambda s: s.arcname)
+    return sources
+
+
+def _pack(items: List[Tuple[int, list]], bins: int, max_size: float) -> Optional[List[list]]:
+    """Place sized items (largest first) into the least loaded of `bins` parts; None if one doesn't fit"""
+    loads = [0] * bins
+    parts: List[list] = [[] for _ in range(bins)]
+    for size, sources in items:
+        index = min(range(bins), key=loads.__getitem__)
+        if loads[index] + size > max_size and loads[index]:
+            return None
+        loads[index] += size
+        parts[index].extend(sources)
+    return parts
+
+
+def _first_fit(items: List[Tuple[int, list]], max_size: float) -> List[list]:
+    loads: List[int] = []
+    parts: List[list] = []
+    for size, sources in items:
+        for index, load in enumerate(loads):
+            if load + size <= max_size:
+                loads[index] += size
+                parts[index].extend(sources)
+                break
+        else:
+            loads.append(size)
+            parts.append(list(sources))
+    return parts
+
+
+def split_sources(folderpath: str, max_size: float) -> List[Tuple[str, List[ZipSource]]]:
+    """
+    Group a folder's files into as few parts of at most `max_size` bytes as
+    possible, with sizes balanced so parallel uploads finish together.
+
+    Files of one directory (a disc, a sub-album) stay in the same part when
+    the directory fits in one. Groups are packed largest first: first-fit
+    decreasing gives the part count to aim for, then each group goes to the
+    least loaded part, trying the lower bound upwards. A file larger than
+    `max_size` still gets a part of its own.
+    Returns (zip_path, sources) per part: folder.zip, folder.part2.zip, ...
+    """
+    groups = {}
+    for source in scan_folder(folderpath):
+        groups.setdefault(os.path.dirname(source.arcname), []).append(source)
+
+    items = []
+    for directory, sources in groups.items():
+        size = sum(s.size for s in sources)
+        # Loose files at the top and directories too big for one part are packed file by file
+        if directory and size <= max_size:
+            items.append((size, sources))
+        else:
+            items.extend((s.size, [s]) for s in sources)
+    items.sort(key=lambda item: item[0], reverse=True)
+
+    parts = _first_fit(items, max_size)
+    total = sum(size for size, _ in items)
+    for bins in range(max(1, math.ceil(total / max_size)), len(parts)):
+        balanced = _pack(items, bins, max_size)
+        if balanced is not None:
+            parts = balanced
+            break
+    else:
+        if parts:
+            parts = _pack(items, len(parts), max_size) or parts
+
+    parts = [sorted(part, key=lambda s: s.arcname) for part in parts if part]
+    parts.sort(key=lambda part: part[0].arcname)
+    return [
+        (f"{folderpath}.zip" if num == 1 else f"{folderpath}.part{num}.zip", sources)
+        for num, sources in enumerate(parts, start=1)
+    ]
+
+
+def restat(sources: List[ZipSource]) -> List[ZipSource]:
+    """The same sources with their current size and mtime"""
+    refreshed = []
+    for source in sources:
+        st = os.stat(source.path)
+        refreshed.append(source._replace(size=st.st_size, mtime=st.st_mtime))
+    return refreshed
+
+
+def choose_method(path: str) -> int:
+    """STORED for media by extension, otherwise deflate only if a sample compresses"""
+    if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+        return STORED
+    try:
+        with open(path, 'rb') as f:
+            sample = f.read(SNIFF_SIZE)
+    except OSError:
+        return STORED
+    if not sample:
+        return STORED
+    return DEFLATED if len(zlib.compress(sample, 1)) < len(sample) * SNIFF_RATIO else STORED
+
+
+def file_crc(path: str, on_bytes: Optional[Callable[[int], None]] = None) -> int:
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return crc
+            crc = zlib.crc32(chunk, crc)
+            if on_bytes:
+                on_bytes(len(chunk))
+
+
+def _deflate(path: str):
+    """(compressed, crc, size) of a whole file; runs in worker threads (zlib releases the GIL)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(), zlib.crc32(data), len(data)
+
+
+def _dos_datetime(mtime: float):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+    )
+
+
+class _Entry(NamedTuple):
+    name: bytes
+    method: int
+    crc: int
+    csize: int
+    usize: int
+    offset: int
+    dostime: int
+    dosdate: int
+
+
+def _local_header(name: bytes, method: int, crc: int, csize: int, usize: int, dostime: int, dosdate: int) -> bytes:
+    zip64 = usize >= ZIP64_LIMIT or csize >= ZIP64_LIMIT
+    extra = struct.pack('<HHQQ', 1, 16, usize, csize) if zip64 else b''
+    return struct.pack(
+        '<IHHHHHIIIHH', 0x04034b50, 45 if zip64 else 20, 0x800, method, dostime, dosdate, crc,
+        ZIP64_LIMIT if zip64 else csize, ZIP64_LIMIT if zip64 else usize, len(name), len(extra)
+    ) + name + extra
+
+
+def _central_directory(entries: List[_Entry], cd_offset: int) -> bytes:
+    """Central directory and end records (with Zip64 records when needed)"""
+    parts = []
+    for e in entries:
+        extra = b''
+        fields = []
+        if e.usize >= ZIP64_LIMIT:
+            fields.append(e.usize)
+        if e.csize >= ZIP64_LIMIT:
+            fields.append(e.csize)
+        if e.offset >= ZIP64_LIMIT:
+            fields.append(e.offset)
+        if fields:
+            extra = struct.pack('<HH', 1, 8 * len(fields)) + struct.pack(f'<{len(fields)}Q', *fields)
+        version = 45 if fields else 20
+        parts.append(struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | version, version, 0x800, e.method,
+            e.dostime, e.dosdate, e.crc,
+            min(e.csize, ZIP64_LIMIT), min(e.usize, ZIP64_LIMIT),
+            len(e.name), len(extra), 0, 0, 0, 0o100644 << 16, min(e.offset, ZIP64_LIMIT)
+        ))
+        parts.append(e.name)
+        parts.append(extra)
+    cd_size = sum(len(p) for p in parts)
+    count = len(entries)
+
+    if count >= ZIP16_LIMIT or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+        zip64_offset = cd_offset + cd_size
+        parts.append(struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset))
+        parts.append(struct.pack('<IIQI', 0x07064b50, 0, zip64_offset, 1))
+    parts.append(struct.pack(
+        '<IHHHHIIH', 0x06054b50, 0, 0, min(count, ZIP16_LIMIT), min(count, ZIP16_LIMIT),
+        min(cd_size, ZIP64_LIMIT), min(cd_offset, ZIP64_LIMIT), 0
+    ))
+    return b''.join(parts)
+
+
+class ZipWriter:
+    """
+    Append-only zip writer without data descriptors. Sizes are always known
+    up front; a STORED entry's CRC is either given (required for pipes) or,
+    on a seekable file, computed while copying and patched into the local
+    header afterwards so the source is read only once.
+    """
+    def __init__(self, fileobj: BinaryIO):
+        self._f = fileobj
+        self._offset = 0
+        self._entries: List[_Entry] = []
+
+    def _write(self, data):
+        self._f.write(data)
+        self._offset += len(data)
+
+    def _add_entry(self, arcname: str, method: int, crc: int, csize: int, usize: int, mtime: float) -> _Entry:
+        name = arcname.encode('utf-8')
+        dostime, dosdate = _dos_datetime(mtime)
+        entry = _Entry(name, method, crc, csize, usize, self._offset, dostime, dosdate)
+        self._write(_local_header(name, method, crc, csize, usize, dostime, dosdate))
+        self._entries.append(entry)
+        return entry
+
+    def add_bytes(self, arcname: str, data: bytes, method: int, crc: int, usize: int, mtime: float):
+        """Add an entry whose (possibly deflated) payload is already in memory"""
+        self._add_entry(arcname, method, crc, len(data), usize, mtime)
+        self._write(data)
+
+    def add_stored(self, arcname: str, path: str, crc: Optional[int], size: int, mtime: float,
+                   on_bytes: Optional[Callable[[int], None]] = None,
+                   should_cancel: Optional[Callable[[], bool]] = None):
+        """Copy a file verbatim as a STORED entry; `crc` None means patch it in afterwards"""
+        entry = self._add_entry(arcname, STORED, crc or 0, size, size, mtime)
+        running = 0
+        with open(path, 'rb') as f:
+            while True:
+                if should_cancel and should_cancel():
+                    raise asyncio.CancelledError()
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if crc is None:
+                    running = zlib.crc32(chunk, running)
+                self._write(chunk)
+                if on_bytes:
+                    on_bytes(len(chunk))
+        if crc is None:
+            end = self._f.tell()
+            self._f.seek(entry.offset + 14)
+            self._f.write(struct.pack('<I', running))
+            self._f.seek(end)
+            self._entries[-1] = entry._replace(crc=running)
+
+    def close(self):
+        self._write(_central_directory(self._entries, self._offset))
+
+
+def _plan_methods(sources: List[ZipSource]) -> List[int]:
+    return [
+        DEFLATED if s.size <= DEFLATE_MAX_SIZE and choose_method(s.path) == DEFLATED else STORED
+        for s in sources
+    ]
+
+
+def write_zip(zip_path: str, sources: List[ZipSource],
+              on_bytes: Optional[Callable[[int], None]] = None,
+              should_cancel: Optional[Callable[[], bool]] = None,
+              remove_sources: bool = False) -> str:
+    """
+    Blocking: build `zip_path` from `sources` in order. Deflate-worthy files
+    are compressed in parallel first; media is streamed in as STORED.
+    `on_bytes` receives the number of source bytes consumed as the zip grows.
+    On cancel the partial archive is removed and CancelledError raised;
+    `remove_sources` deletes the sources only after the archive is complete.
+    """
+    methods = _plan_methods(sources)
+    try:
+        with ThreadPoolExecutor(max_workers=DEFLATE_WORKERS) as pool:
+            deflated = {
+                i: pool.submit(_deflate, s.path)
+                for i, (s, m) in enumerate(zip(sources, methods)) if m == DEFLATED
+            }
+            with open(zip_path, 'wb') as f:
+                writer = ZipWriter(f)
+                for i, source in enumerate(sources):
+                    if should_cancel and should_cancel():
+                        raise asyncio.CancelledError()
+                    if i in deflated:
+                        data, crc, size = deflated[i].result()
+                        writer.add_bytes(source.arcname, data, DEFLATED, crc, size, source.mtime)
+                        if on_bytes:
+                            on_bytes(size)
+                    else:
+                        writer.add_stored(source.arcname, source.path, None, source.size, source.mtime,
+                                          on_bytes, should_cancel)
+                writer.close()
+    except BaseException:
+        try:
+            os.remove(zip_path)
+        except OSError:
+            pass
+        raise
+    # Only once the archive is complete, so a failure part-way never loses files
+    if remove_sources:
+        for source in sources:
+            os.remove(source.path)
+    return zip_path
+
+
+class VirtualZip(io.RawIOBase):
+    """
+    A zip archive that only exists as a layout: header and central directory
+    bytes, in-memory deflated sidecars, and byte ranges of the source files
+    for STORED entries. Its size is known up front and any range can be read
+    on demand, so pyrogram can upload it like a file (it seeks to measure it
+    and re-reads parts on retry) and rclone can receive it through rcat,
+    without the archive ever being written to disk.
+
+    The sources must not change between planning and upload.
+    """
+    def __init__(self, path: str, segments: List[tuple], sources: List[ZipSource]):
+        self.path = path
+        # pyrogram uses .name as the document's file name
+        self.name = os.path.basename(path)
+        self.sources = sources
+        self._segments = segments
+        self._starts = [start for start, _, _ in segments]
+        self.size = segments[-1][0] + segments[-1][1] if segments else 0
+        self._pos = 0
+        self._open: Optional[tuple] = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def _read_file(self, path: str, offset: int, n: int) -> bytes:
+        if self._open is None or self._open[0] != path:
+            self._close_file()
+            self._open = (path, open(path, 'rb'))
+        f = self._open[1]
+        f.seek(offset)
+        data = f.read(n)
+        if len(data) != n:
+            raise OSError(f"{path} changed after the zip was planned")
+        return data
+
+    def _close_file(self):
+        if self._open is not None:
+            self._open[1].close()
+            self._open = None
+
+    def read(self, n: int = -1) -> bytes:
+        """Always returns `n` bytes unless at the end (pyrogram's parts must be full size)"""
+        if n is None or n < 0:
+            n = self.size - self._pos
+        parts = []
+        while n > 0 and self._pos < self.size:
+            index = bisect.bisect_right(self._starts, self._pos) - 1
+            start, length, payload = self._segments[index]
+            offset = self._pos - start
+            count = min(n, length - offset)
+            if isinstance(payload, bytes):
+                parts.append(payload[offset:offset + count])
+            else:
+                parts.append(self._read_file(payload, offset, count))
+            self._pos += count
+            n -= count
+        return b''.join(parts)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._close_file()
+        super().close()
+
+    def discard(self):
+        """Remove the source files, as writing a real zip would have (and a real zip written as a fallback)"""
+        self.close()
+        for path in [source.path for source in self.sources] + [self.path]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def discard_zip(item: Union[str, 'VirtualZip']):
+    """Remove a zip after delivery: the file, or a virtual zip's source files"""
+    try:
+        if isinstance(item, VirtualZip):
+            item.discard()
+        else:
+            os.remove(item)
+    except FileNotFoundError:
+        pass
+
+
+def plan_virtual_zip(zip_path: str, sources: List[ZipSource],
+                     on_bytes: Optional[Callable[[int], None]] = None,
+                     should_cancel: Optional[Callable[[], bool]] = None) -> VirtualZip:
+    """
+    Blocking: read every source once to get its CRC (deflating sidecars in
+    parallel) and lay out the archive `write_zip` would have produced.
+    `zip_path` only names the archive; nothing is written.
+    """
+    methods = _plan_methods(sources)
+    segments: List[tuple] = []
+    entries: List[_Entry] = []
+    offset = 0
+
+    def _segment(payload: Union[bytes, str], length: int):
+        nonlocal offset
+        if length:
+            segments.append((offset, length, payload))
+            offset += length
+
+    with ThreadPoolExecutor(max_workers=DEFLATE_WORKERS) as pool:
+        deflated = {
+            i: pool.submit(_deflate, s.path)
+            for i, (s, m) in enumerate(zip(sources, methods)) if m == DEFLATED
+        }
+        for i, source in enumerate(sources):
+            if should_cancel and should_cancel():
+                raise asyncio.CancelledError()
+            if i in deflated:
+                payload, crc, usize = deflated[i].result()
+                csize = len(payload)
+                if on_bytes:
+                    on_bytes(usize)
+            else:
+                payload, crc, usize = source.path, file_crc(source.path, on_bytes), source.size
+                csize = usize
+            name = source.arcname.encode('utf-8')
+            dostime, dosdate = _dos_datetime(source.mtime)
+            entries.append(_Entry(name, methods[i], crc, csize, usize, offset, dostime, dosdate))
+            header = _local_header(name, methods[i], crc, csize, usize, dostime, dosdate)
+            _segment(header, len(header))
+            _segment(payload, csize)
+
+    directory = _central_directory(entries, offset)
+    _segment(directory, len(directory))
+    return VirtualZip(zip_path, segments, sources)
+
+
+async def _run_with_progress(func, zip_path: str, sources: List[ZipSource], progress,
+                             cancel_event: Optional[asyncio.Event], *args):
+    """
+    Run a blocking zip function in a thread, reporting bytes to a ProgressReporter.
+    Progress is read by the reporter's own ticker, so the worker thread only
+    adds to a counter and wakes it through the loop.
+    """
+    loop = asyncio.get_running_loop()
+    total = sum(s.size for s in sources)
+    done = 0
+
+    def _on_bytes(n: int):
+        nonlocal done
+        done += n
+        if progress:
+            loop.call_soon_threadsafe(progress.on_zip_progress, done, total)
+
+    should_cancel = cancel_event.is_set if cancel_event else None
+    if progress:
+        progress.on_zip_progress(0, total)
+    return await asyncio.to_thread(func, zip_path, sources, _on_bytes, should_cancel, *args)
+
+
+async def write_zip_async(zip_path: str, sources: List[ZipSource], progress=None,
+                          cancel_event: Optional[asyncio.Event] = None,
+                          remove_sources: bool = False) -> str:
+    """write_zip in a thread, with progress and cancellation"""
+    return await _run_with_progress(write_zip, zip_path, sources, progress, cancel_event, remove_sources)
+
+
+async def plan_virtual_zip_async(zip_path: str, sources: List[ZipSource], progress=None,
+                                 cancel_event: Optional[asyncio.Event] = None) -> VirtualZip:
+    """plan_virtual_zip in a thread, with progress and cancellation"""
+    return await _run_with_progress(plan_virtual_zip, zip_path, sources, progress, cancel_event)
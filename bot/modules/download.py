@@ -1,9 +1,11 @@
+import re
 import asyncio
 from pyrogram.types import Message
 from pyrogram import Client, filters
 
 from bot import CMD
 from bot.logger import LOGGER
+from bot.tgclient import aio
 
 import bot.helpers.translations as lang
 
@@ -16,6 +18,15 @@ from ..providers.apple import start_apple
 # IMPORT EDIT_MESSAGE HERE:
 from ..helpers.message import send_message, antiSpam, check_user, fetch_user_details, edit_message
 
+TIDAL_LINKS = ("https://tidal.com", "https://listen.tidal.com", "tidal.com", "listen.tidal.com")
+DEEZER_LINKS = ("https://link.deezer.com", "https://deezer.com", "deezer.com", "https://www.deezer.com", "link.deezer.com")
+QOBUZ_LINKS = ("https://play.qobuz.com", "https://open.qobuz.com", "https://www.qobuz.com")
+SPOTIFY_LINKS = ("https://open.spotify.com",)
+APPLE_MUSIC_LINKS = ("https://music.apple.com",)
+
+CONTENT_TYPE_PATTERN = re.compile(r'/(track|song|video|music-video|album|playlist|mix|artist)/')
+CONTENT_TYPE_ALIASES = {'song': 'track', 'music-video': 'video', 'mix': 'playlist'}
+
 
 @Client.on_message(filters.command(CMD.DOWNLOAD))
 async def download_track(c, msg: Message):
@@ -47,35 +58,17 @@ async def download_track(c, msg: Message):
             user['link'] = link
             from bot.helpers.tasks import task_manager
             from bot.settings import bot_set
-            # If queue mode is ON, enqueue the job to run one-by-one
+            # If queue mode is ON, enqueue the job for the queue workers
             if getattr(bot_set, 'queue_mode', False):
-                # Build a small function that will create its own task state when executed
-                async def _job():
-                    state = await task_manager.create(user, label="Download")
-                    u = dict(user)
-                    u['task_id'] = state.task_id
-                    u['cancel_event'] = state.cancel_event
-                    u['bot_msg'] = await send_message(msg, f"Starting download…\nUse /cancel <code>{state.task_id}</code> to stop.")
-                    await send_message(u, f"Task ID:\n<code>{state.task_id}</code>")
-                    try:
-                        await start_link(link, u, options)
-                        await send_message(u, lang.s.TASK_COMPLETED)
-                    except asyncio.CancelledError:
-                        await send_message(u, "⏹️ Task cancelled")
-                    except Exception as e:
-                        LOGGER.error(f"Download failed: {e}")
-                        error_msg = f"Download failed: {str(e)}"
-                        await send_message(u, error_msg)
-                    try:
-                        await c.delete_messages(msg.chat.id, u['bot_msg'].id)
-                    except Exception:
-                        pass
-                    await cleanup(u)
-                    await task_manager.finish(state.task_id, status="cancelled" if state.cancel_event.is_set() else "done")
-                    await antiSpam(msg.from_user.id, msg.chat.id, True)
-
-                qid, pos = await task_manager.enqueue(user['user_id'], link, options, _job)
-                await send_message(user, f"✅ Added to queue. ID: <code>{qid}</code>\nPosition: {pos}")
+                qid, pos = await task_manager.enqueue(
+                    user['user_id'], link, options, build_queue_job(user, link, options),
+                    provider=detect_provider(link),
+                    kind=detect_content_type(link),
+                    admin=user['user_id'] in bot_set.admins,
+                    user=user
+                )
+                wait = await task_manager.estimate_wait(qid)
+                await send_message(user, f"✅ Added to queue. ID: <code>{qid}</code>\nPosition: {pos}\nEstimated wait: {format_wait(wait)}")
                 return
 
             # Otherwise, run immediately as before
@@ -99,6 +92,53 @@ async def download_track(c, msg: Message):
             await antiSpam(msg.from_user.id, msg.chat.id, True)
 
 
+def build_queue_job(user: dict, link: str, options: dict):
+    """
+    Build the Queue Mode job for a link. Only plain user fields are used so the
+    same job can be rebuilt from the database after a restart (see TaskManager.restore).
+    """
+    from bot.helpers.tasks import task_manager
+
+    async def _job():
+        state = await task_manager.create(user, label="Download")
+        u = dict(user)
+        u['task_id'] = state.task_id
+        u['cancel_event'] = state.cancel_event
+        u['bot_msg'] = await send_message(u, f"Starting download…\nUse /cancel <code>{state.task_id}</code> to stop.")
+        await send_message(u, f"Task ID:\n<code>{state.task_id}</code>")
+        try:
+            await start_link(link, u, options)
+            await send_message(u, lang.s.TASK_COMPLETED)
+        except asyncio.CancelledError:
+            if task_manager.stopping:
+                # Shutdown, not /cancel: keep partial files, journals and the persisted row for restore
+                raise
+            await send_message(u, "⏹️ Task cancelled")
+        except Exception as e:
+            LOGGER.error(f"Download failed: {e}")
+            error_msg = f"Download failed: {str(e)}"
+            await send_message(u, error_msg)
+        try:
+            await aio.delete_messages(u['chat_id'], u['bot_msg'].id)
+        except Exception:
+            pass
+        await cleanup(u)
+        await task_manager.finish(state.task_id, status="cancelled" if state.cancel_event.is_set() else "done")
+        await antiSpam(u['user_id'], u['chat_id'], True)
+
+    return _job
+
+
+def format_wait(seconds: float) -> str:
+    """Human friendly queue wait estimate"""
+    if seconds < 60:
+        return "less than a minute"
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"~{minutes} min"
+    return f"~{minutes // 60} h {minutes % 60} min"
+
+
 def parse_options(parts: list) -> dict:
     """Parse command-line options from message parts
     
@@ -124,6 +164,40 @@ def parse_options(parts: list) -> dict:
     return options
 
 
+def detect_content_type(link: str) -> str | None:
+    """
+    Guess track/album/playlist/artist/video from the URL path so the queue can
+    estimate job size before any provider API call
+    """
+    if 'music.apple.com' in link and ('?i=' in link or '&i=' in link):
+        return 'track'
+    matches = CONTENT_TYPE_PATTERN.findall(link.split('?')[0])
+    if not matches:
+        return None
+    # Nested paths such as /album/1/track/2 name the actual item last
+    kind = matches[-1]
+    return CONTENT_TYPE_ALIASES.get(kind, kind)
+
+
+def detect_provider(link: str) -> str | None:
+    """
+    Name of the provider a link will be routed to by start_link
+    (used for queue concurrency caps)
+    """
+    from bot.settings import bot_set
+    if link.startswith(TIDAL_LINKS):
+        return 'tidal' if bot_set.tidal_legacy_enabled else 'tidal_ng'
+    if link.startswith(DEEZER_LINKS):
+        return 'deezer'
+    if link.startswith(QOBUZ_LINKS):
+        return 'qobuz'
+    if link.startswith(SPOTIFY_LINKS):
+        return 'spotify'
+    if link.startswith(APPLE_MUSIC_LINKS):
+        return 'apple'
+    return None
+
+
 async def start_link(link: str, user: dict, options: dict = None):
     """
     Route download request to appropriate provider handler
@@ -133,26 +207,20 @@ async def start_link(link: str, user: dict, options: dict = None):
         user: User details dictionary
         options: Command-line options passed by user
     """
-    tidal = ["https://tidal.com", "https://listen.tidal.com", "tidal.com", "listen.tidal.com"]
-    deezer = ["https://link.deezer.com", "https://deezer.com", "deezer.com", "https://www.deezer.com", "link.deezer.com"]
-    qobuz = ["https://play.qobuz.com", "https://open.qobuz.com", "https://www.qobuz.com"]
-    spotify = ["https://open.spotify.com"]
-    apple_music = ["https://music.apple.com"]
-
     from bot.settings import bot_set
-    if link.startswith(tuple(tidal)):
+    if link.startswith(TIDAL_LINKS):
         if bot_set.tidal_legacy_enabled:
             await start_tidal(link, user)
         else:
             await start_tidal_ng(link, user)
-    elif link.startswith(tuple(deezer)):
+    elif link.startswith(DEEZER_LINKS):
         await start_deezer(link, user)
-    elif link.startswith(tuple(qobuz)):
+    elif link.startswith(QOBUZ_LINKS):
         user['provider'] = 'Qobuz'
         await start_qobuz(link, user)
-    elif link.startswith(tuple(spotify)):
+    elif link.startswith(SPOTIFY_LINKS):
         return 'spotify'
-    elif link.startswith(tuple(apple_music)):
+    elif link.startswith(APPLE_MUSIC_LINKS):
         user['provider'] = 'Apple'
         # USE IMPORTED EDIT_MESSAGE FUNCTION
         await edit_message(user['bot_msg'], "Starting Apple Music download...")
@@ -6,6 +6,7 @@ import shutil
 from bot.helpers.utils import (
     run_apple_downloader,
     extract_apple_metadata,
+    extract_many,
     send_message,
     edit_message,
     format_string,
@@ -65,6 +66,7 @@ class AppleMusicProvider:
         )
         if not result['success']:
             LOGGER.error(f"Apple downloader failed: {result['error']}")
+            await reporter.close(render=False)
             return result
         
         # Find downloaded files from global Apple folders (alac/atmos/aac)
@@ -72,21 +74,21 @@ class AppleMusicProvider:
         
         if not files:
             LOGGER.error("No files found in global Apple output folders")
+            await reporter.close(render=False)
             return {'success': False, 'error': "No files downloaded"}
         
         LOGGER.info(f"Found {len(files)} files in global Apple output folders")
         
-        # Extract metadata
+        # Extract metadata (in worker threads, results arrive as they finish)
         items = []
-        for file_path in files:
-            try:
-                metadata = await extract_apple_metadata(file_path)
-                metadata['filepath'] = file_path
-                metadata['provider'] = self.name
-                items.append(metadata)
-                LOGGER.info(f"Processed file: {file_path}")
-            except Exception as e:
-                LOGGER.error(f"Metadata extraction failed for {file_path}: {str(e)}")
+        async for file_path, metadata in extract_many(files, extract_apple_metadata, progress=reporter):
+            metadata['filepath'] = file_path
+            metadata['provider'] = self.name
+            items.append(metadata)
+            LOGGER.info(f"Processed file: {file_path}")
+        # Keep the downloader's file order
+        order = {file_path: i for i, file_path in enumerate(files)}
+        items.sort(key=lambda item: order[item['filepath']])
         
         # Handle case where no metadata was extracted
         if not items:
@@ -223,11 +225,14 @@ async def start_apple(link: str, user: dict, options: dict = None):
         cleanup_apple_global()
         try:
             await user['progress'].set_stage("Done")
+            await user['progress'].close()
         except Exception:
             await edit_message(user['bot_msg'], "✅ Apple Music download completed!")
         
     except asyncio.CancelledError:
         try:
+            if user.get('progress'):
+                await user['progress'].close(render=False)
             await edit_message(user['bot_msg'], "⏹️ Task cancelled. Cleaning up…")
         except Exception:
             pass
@@ -237,6 +242,7 @@ async def start_apple(link: str, user: dict, options: dict = None):
         logger.error(f"Apple Music error: {str(e)}", exc_info=True)
         try:
             await user.get('progress', None).set_stage("Done")
+            await user['progress'].close()
         except Exception:
             await edit_message(user['bot_msg'], f"❌ Error: {str(e)}")
         await cleanup(user)
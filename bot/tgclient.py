@@ -2,6 +2,9 @@ from config import Config
 from pyrogram import Client
 from .logger import LOGGER
 from .settings import bot_set
+from .helpers.http_client import http_client
+from .helpers.sysstats import system_stats
+from .helpers.deezer.decrypt import shutdown_pool as shutdown_decrypt_pool
 import subprocess
 import os
 
@@ -23,6 +26,9 @@ class Bot(Client):
 
     async def start(self):
         await super().start()
+        # Shared pooled HTTP session for all downloads
+        await http_client.start()
+        system_stats.start()
         await bot_set.login_qobuz()
         await bot_set.login_deezer()
         await bot_set.login_tidal()
@@ -37,15 +43,23 @@ class Bot(Client):
             from .helpers.tasks import task_manager
             if getattr(bot_set, 'queue_mode', False):
                 await task_manager.start_worker()
-        except Exception:
-            pass
+            # Jobs queued before a restart are picked up again (this starts the workers if needed)
+            from .modules.download import build_queue_job
+            await task_manager.restore(build_queue_job)
+        except Exception as e:
+            LOGGER.error(f"Queue: startup failed: {e}")
 
         LOGGER.info("BOT : Started Successfully with Apple Music support")
 
     async def stop(self, *args):
+        from .helpers.tasks import task_manager
+        await task_manager.stop_workers()
         await super().stop()
         for client in bot_set.clients:
             await client.session.close()
+        await http_client.close()
+        await system_stats.stop()
+        shutdown_decrypt_pool()
         LOGGER.info('BOT : Exited Successfully!')
 
 aio = Bot()
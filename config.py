@@ -61,6 +61,7 @@ class Config:
     DEEZER_PASSWORD   = getenv("DEEZER_PASSWORD")                          # Password
     DEEZER_BF_SECRET  = getenv("DEEZER_BF_SECRET")                         # Secret token
     DEEZER_ARL        = getenv("DEEZER_ARL")                               # ARL cookie
+    DEEZER_DECRYPT_WORKERS = int(getenv("DEEZER_DECRYPT_WORKERS", 0))     # Processes for stripe decryption, 0 = a thread (int)
 
     # Tidal Configuration
     ENABLE_TIDAL           = getenv("ENABLE_TIDAL", "False")              # True or False
@@ -78,6 +79,35 @@ class Config:
 
     # Concurrent Workers
     MAX_WORKERS      = int(getenv("MAX_WORKERS", 5))                       # Number of threads (int)
+    QUEUE_WORKERS    = int(getenv("QUEUE_WORKERS", 2))                     # Queue Mode jobs run in parallel (int)
+    QUEUE_PROVIDER_CAPS = getenv("QUEUE_PROVIDER_CAPS", "apple:1,tidal_ng:1") # Max parallel queue jobs per provider (str)
+    QUEUE_AGING_RATE = float(getenv("QUEUE_AGING_RATE", 0.05))            # Cost units a waiting job gains per second (float)
+    QUEUE_SECONDS_PER_COST = float(getenv("QUEUE_SECONDS_PER_COST", 20))   # Initial wait estimate per cost unit (float)
+    UPLOAD_QUEUE_SIZE = int(getenv("UPLOAD_QUEUE_SIZE", 4))                # Downloaded tracks allowed to wait for upload per album (int)
+    UPLOAD_CONCURRENCY = int(getenv("UPLOAD_CONCURRENCY", 1))              # Parallel Telegram uploads per album/playlist batch (int)
+    FILE_ID_CACHE = getenv("FILE_ID_CACHE", "True").lower() == "true"      # Re-send earlier uploads by Telegram file_id (bool)
+    MEDIA_CACHE_DIR  = getenv("MEDIA_CACHE_DIR", LEGACY_WORK_DIR + "media_cache") # Shared cache of downloaded tracks (path)
+    MEDIA_CACHE_SIZE = int(getenv("MEDIA_CACHE_SIZE", 0))                  # Max cache size in bytes, 0 disables (int)
+    MEDIA_CACHE_TTL  = int(getenv("MEDIA_CACHE_TTL", 6 * 3600))            # Seconds an unused cached track is kept (int)
+    SYSSTATS_INTERVAL = float(getenv("SYSSTATS_INTERVAL", 5))              # Seconds between host stats samples for progress (float)
+    METADATA_WORKERS = int(getenv("METADATA_WORKERS", 4))                  # Threads reading tags of downloaded files (int)
+    TAG_CACHE_SIZE = int(getenv("TAG_CACHE_SIZE", 64))                     # Parsed audio files kept in memory, 0 disables (int)
+    VIRTUAL_ZIP = getenv("VIRTUAL_ZIP", "True").lower() == "true"          # Stream zips to Telegram/rclone without writing them (bool)
+
+    # HTTP Client (shared pooled session used by all downloads)
+    HTTP_POOL_LIMIT          = int(getenv("HTTP_POOL_LIMIT", 100))         # Max open connections in total (int)
+    HTTP_POOL_LIMIT_PER_HOST = int(getenv("HTTP_POOL_LIMIT_PER_HOST", 16)) # Max open connections per host (int)
+    HTTP_DNS_CACHE_TTL       = int(getenv("HTTP_DNS_CACHE_TTL", 300))      # Seconds to cache DNS lookups (int)
+    HTTP_KEEPALIVE_TIMEOUT   = int(getenv("HTTP_KEEPALIVE_TIMEOUT", 30))   # Seconds to keep idle connections (int)
+    DOWNLOAD_SEGMENTS        = int(getenv("DOWNLOAD_SEGMENTS", 4))         # Parallel byte ranges per large file, 1 disables (int)
+    DOWNLOAD_SEGMENT_MIN_SIZE = int(getenv("DOWNLOAD_SEGMENT_MIN_SIZE", 8 * 1024 * 1024)) # Min file size in bytes for ranged downloads (int)
+
+    # Resource Governor (shared transfer slots and bandwidth, 0 = unlimited)
+    GOVERNOR_GLOBAL_SLOTS    = int(getenv("GOVERNOR_GLOBAL_SLOTS", 16))    # Concurrent transfers across everything (int)
+    GOVERNOR_GLOBAL_RATE     = int(getenv("GOVERNOR_GLOBAL_RATE", 0))      # Total download bytes/sec (int)
+    GOVERNOR_PROVIDER_SLOTS  = int(getenv("GOVERNOR_PROVIDER_SLOTS", 8))   # Concurrent transfers per provider (int)
+    GOVERNOR_PROVIDER_RATE   = int(getenv("GOVERNOR_PROVIDER_RATE", 0))    # Download bytes/sec per provider (int)
+    GOVERNOR_UPLOAD_SLOTS    = int(getenv("GOVERNOR_UPLOAD_SLOTS", 4))     # Concurrent uploads (Telegram/Rclone) (int)
 
     # Apple Music Configuration
     DOWNLOADER_PATH   = getenv("DOWNLOADER_PATH", "/usr/src/app/downloader/am_downloader.sh")  
@@ -268,6 +268,7 @@ def _download(ctx: typer.Context, urls: list[str], try_login: bool = True) -> bo
         finally:
             progress.refresh()
             progress.stop()
+            dl.shutdown(wait=False)
 
     return True
 
@@ -17,6 +17,7 @@ import time
 from collections.abc import Callable
 from concurrent import futures
 from threading import Event
+from typing import BinaryIO
 from uuid import uuid4
 
 import m3u8
@@ -32,7 +33,6 @@ from tidalapi.media import AudioExtensions, Codec, Quality, Stream, StreamManife
 
 from tidal_dl_ng.config import Settings
 from tidal_dl_ng.constants import (
-    CHUNK_SIZE,
     COVER_NAME,
     EXTENSION_LYRICS,
     PLAYLIST_EXTENSION,
@@ -43,13 +43,13 @@ from tidal_dl_ng.constants import (
     MediaType,
     QualityVideo,
 )
-from tidal_dl_ng.helper.decryption import decrypt_file, decrypt_security_token
+from tidal_dl_ng.helper.decryption import decrypt_security_token, stream_decryptor
 from tidal_dl_ng.helper.exceptions import MediaMissing
 from tidal_dl_ng.helper.path import (
     check_file_exists,
     format_path_media,
     path_file_sanitize,
-    url_to_filename,
+    segment_id_from_url,
 )
 from tidal_dl_ng.helper.tidal import (
     instantiate_media,
@@ -69,6 +69,14 @@ from tidal_dl_ng.model.gui_data import ProgressBars
 class RequestsClient:
     """HTTP client for downloading text content from a URI."""
 
+    def __init__(self, session: requests.Session | None = None) -> None:
+        """Initialize the client.
+
+        Args:
+            session (requests.Session | None, optional): Pooled session to send requests with. Defaults to None.
+        """
+        self.session = session
+
     def download(
         self, uri: str, timeout: int = REQUESTS_TIMEOUT_SEC, headers: dict | None = None, verify_ssl: bool = True
     ) -> tuple[str, str]:
@@ -86,7 +94,7 @@ class RequestsClient:
         if not headers:
             headers = {}
 
-        o = requests.get(uri, timeout=timeout, headers=headers)
+        o = (self.session or requests).get(uri, timeout=timeout, headers=headers, verify=verify_ssl)
 
         return o.text, o.url
 
@@ -104,6 +112,10 @@ class Download:
     progress_overall: Progress
     event_abort: Event
     event_run: Event
+    http_session: requests.Session
+    requests_client: RequestsClient
+    executor_items: futures.ThreadPoolExecutor
+    executor_segments: futures.ThreadPoolExecutor
 
     def __init__(
         self,
@@ -140,6 +152,19 @@ class Download:
         self.path_base = path_base
         self.event_abort = event_abort
         self.event_run = event_run
+        self.http_session = self._http_session_create()
+        self.requests_client = RequestsClient(self.http_session)
+        # Long-lived pools: threads are started once per instance. Items and segments use separate pools,
+        # so an item waiting for its segments can never starve them. The segment pool has room for every
+        # concurrent item to run its `downloads_simultaneous_per_track_max` segments; each item keeps at
+        # most that many segments in flight itself (see `_download_segments`).
+        self.executor_items = futures.ThreadPoolExecutor(
+            max_workers=self.settings.data.downloads_concurrent_max, thread_name_prefix="tidal-dl-ng-item"
+        )
+        self.executor_segments = futures.ThreadPoolExecutor(
+            max_workers=self._segment_workers(),
+            thread_name_prefix="tidal-dl-ng-segment",
+        )
 
         if not self.settings.data.path_binary_ffmpeg and (
             self.settings.data.video_convert_mp4 or self.settings.data.extract_flac
@@ -153,6 +178,47 @@ class Download:
                 "be set in (`path_binary_ffmpeg`)."
             )
 
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pools and close the pooled HTTP session.
+
+        Args:
+            wait (bool, optional): Block until running downloads have finished. Defaults to True.
+        """
+        self.executor_items.shutdown(wait=wait, cancel_futures=True)
+        self.executor_segments.shutdown(wait=wait, cancel_futures=True)
+        self.http_session.close()
+
+    def _segment_workers(self) -> int:
+        """Return the size of the shared segment pool.
+
+        Returns:
+            int: Concurrent items times simultaneous segments per track.
+        """
+        return max(
+            1, self.settings.data.downloads_concurrent_max * self.settings.data.downloads_simultaneous_per_track_max
+        )
+
+    def _http_session_create(self) -> requests.Session:
+        """Create the pooled HTTP session shared by all downloads of this instance.
+
+        The connection pool is sized to the maximum number of threads that can use it at once
+        (all segment workers plus the item workers, which fetch manifests and covers themselves),
+        so no connection is discarded while busy. The retry adapter is mounted once instead of per segment.
+
+        Returns:
+            requests.Session: Session with retrying, pooled adapters.
+        """
+        pool_size: int = self._segment_workers() + max(1, self.settings.data.downloads_concurrent_max)
+        # Retry download on failed requests, with an exponential delay between retries
+        retries = Retry(total=5, backoff_factor=1)  # , status_forcelist=[ 502, 503, 504 ])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        session = requests.Session()
+
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
     def _get_media_urls(
         self,
         media: Track | Video,
@@ -172,7 +238,7 @@ class Download:
             return stream_manifest.get_urls()
         elif isinstance(media, Video):
             quality_video = self.settings.data.quality_video
-            m3u8_variant: m3u8.M3U8 = m3u8.load(media.get_url())
+            m3u8_variant: m3u8.M3U8 = m3u8.load(media.get_url(), http_client=self.requests_client)
             # Find the desired video resolution or the next best one.
             m3u8_playlist, _ = self._extract_video_stream(m3u8_variant, int(quality_video))
 
@@ -205,15 +271,11 @@ class Download:
             progress_total: int = urls_count
             block_size: int | None = None
         elif urls_count == 1:
-            try:
-                # Get file size and compute progress steps
-                r = requests.head(urls[0], timeout=REQUESTS_TIMEOUT_SEC)
-
+            # Get file size and compute progress steps
+            with self.http_session.head(urls[0], timeout=REQUESTS_TIMEOUT_SEC) as r:
                 total_size_in_bytes: int = int(r.headers.get("content-length", 0))
                 block_size = 1048576
                 progress_total = total_size_in_bytes / block_size
-            finally:
-                r.close()
         else:
             raise ValueError
 
@@ -228,104 +290,143 @@ class Download:
     def _download_segments(
         self,
         urls: list[str],
-        path_base: pathlib.Path,
+        path_file: pathlib.Path,
         block_size: int | None,
         p_task: TaskID,
         progress_to_stdout: bool,
-    ) -> tuple[bool, list[DownloadSegmentResult]]:
-        """Download all segments with progress reporting and abort handling.
+        decryptor=None,
+    ) -> bool:
+        """Download all segments and write them straight into the target file in order.
+
+        A single URL is streamed directly into the file. Multiple segments are fetched
+        concurrently into memory and appended in playback order; at most a fixed window of
+        segments is in flight or waiting, which bounds the reorder buffer.
 
         Args:
             urls (list[str]): List of segment URLs.
-            path_base (pathlib.Path): Base path for segment files.
+            path_file (pathlib.Path): Path to the output file.
             block_size (int | None): Block size for streaming.
             p_task (TaskID): Progress bar task ID.
             progress_to_stdout (bool): Whether to show progress in stdout.
+            decryptor (optional): Stream cipher from `stream_decryptor`; data is decrypted while written.
 
         Returns:
-            tuple[bool, list[DownloadSegmentResult]]: (result_segments, list of segment results)
+            bool: True if the file was written completely, False otherwise.
         """
-        result_segments: bool = True
-        dl_segment_results: list[DownloadSegmentResult] = []
+        with path_file.open("wb") as f_target:
+            if len(urls) == 1:
+                result_dl_segment: DownloadSegmentResult = self._download_segment(
+                    urls[0], block_size, p_task, progress_to_stdout, f_target, decryptor
+                )
 
-        # Download segments until progress is finished.
-        # TODO: Compute download speed (https://github.com/Textualize/rich/blob/master/examples/downloader.py)
-        while not self.progress.tasks[p_task].finished:
-            with futures.ThreadPoolExecutor(
-                max_workers=self.settings.data.downloads_simultaneous_per_track_max
-            ) as executor:
-                # Dispatch all download tasks to worker threads
-                l_futures: list[futures.Future] = [
-                    executor.submit(self._download_segment, url, path_base, block_size, p_task, progress_to_stdout)
-                    for url in urls
-                ]
-
-                # Report results as they become available
-                for future in futures.as_completed(l_futures):
-                    # Retrieve result
-                    result_dl_segment: DownloadSegmentResult = future.result()
-
-                    dl_segment_results.append(result_dl_segment)
-
-                    # Check for a link that was skipped
-                    if not result_dl_segment.result and (result_dl_segment.url is not urls[-1]):
-                        # Sometimes it happens, if a track is very short (< 8 seconds or so), that the last URL in `urls` is
-                        # invalid (HTTP Error 500) and not necessary. File won't be corrupt.
-                        # If this is NOT the case, but any other URL has resulted in an error,
-                        # mark the whole thing as corrupt.
-                        result_segments = False
-
-                        self.fn_logger.error("Something went wrong while downloading. File is corrupt!")
-
-                    # If app is terminated (CTRL+C)
-                    if self.event_abort.is_set():
-                        # Cancel all not yet started tasks
-                        for f in l_futures:
-                            f.cancel()
-
-                        return False, dl_segment_results
-
-        return result_segments, dl_segment_results
-
-    def _download_postprocess(
+                return result_dl_segment.result and not self.event_abort.is_set()
+
+            return self._download_segments_ordered(urls, f_target, block_size, p_task, progress_to_stdout, decryptor)
+
+    def _download_segments_ordered(
         self,
-        result_segments: bool,
-        path_file: pathlib.Path,
-        dl_segment_results: list[DownloadSegmentResult],
-        media: Track | Video,
-        stream_manifest: StreamManifest | None = None,
-    ) -> tuple[bool, pathlib.Path]:
-        """Merge segments, decrypt if needed, and return the final file path.
+        urls: list[str],
+        f_target: BinaryIO,
+        block_size: int | None,
+        p_task: TaskID,
+        progress_to_stdout: bool,
+        decryptor=None,
+    ) -> bool:
+        """Fetch segments concurrently and append them to `f_target` in playback order.
 
         Args:
-            result_segments (bool): Whether all segments downloaded successfully.
-            path_file (pathlib.Path): Path to the output file.
-            dl_segment_results (list[DownloadSegmentResult]): List of segment download results.
-            media (Track | Video): The media item.
-            stream_manifest (StreamManifest | None, optional): Stream manifest for tracks. Defaults to None.
+            urls (list[str]): List of segment URLs.
+            f_target (BinaryIO): Output file opened for writing.
+            block_size (int | None): Block size for streaming.
+            p_task (TaskID): Progress bar task ID.
+            progress_to_stdout (bool): Whether to show progress in stdout.
+            decryptor (optional): Stream cipher from `stream_decryptor`.
 
         Returns:
-            tuple[bool, pathlib.Path]: (Success, path to downloaded or decrypted file)
+            bool: True if all required segments were written, False otherwise.
         """
-        tmp_path_file_decrypted: pathlib.Path = path_file
-        result_merge: bool = False
+        result_segments: bool = True
+        # At most this many segments of this track are in flight (and held in memory) at once, which keeps
+        # `downloads_simultaneous_per_track_max` a per-track limit on the shared segment pool.
+        window: int = max(1, self.settings.data.downloads_simultaneous_per_track_max)
+        # Bring list into right order, so segments can be appended directly.
+        urls_ordered: list[str] = sorted(urls, key=segment_id_from_url)
+
+        executor: futures.ThreadPoolExecutor = self.executor_segments
+
+        # TODO: Compute download speed (https://github.com/Textualize/rich/blob/master/examples/downloader.py)
+        l_futures: list[futures.Future] = [
+            executor.submit(self._download_segment, url, block_size, p_task, progress_to_stdout)
+            for url in urls_ordered[:window]
+        ]
+
+        for position, future in enumerate(l_futures):
+            # Keep the window full: schedule the segment that just became admissible.
+            if position + window < len(urls_ordered):
+                l_futures.append(
+                    executor.submit(
+                        self._download_segment,
+                        urls_ordered[position + window],
+                        block_size,
+                        p_task,
+                        progress_to_stdout,
+                    )
+                )
+
+            result_dl_segment: DownloadSegmentResult = future.result()
+
+            # If app is terminated (CTRL+C)
+            if self.event_abort.is_set():
+                # Cancel all not yet started tasks
+                for f in l_futures:
+                    f.cancel()
+
+                return False
+
+            if not result_dl_segment.result:
+                # Sometimes it happens, if a track is very short (< 8 seconds or so), that the last URL in `urls` is
+                # invalid (HTTP Error 500) and not necessary. File won't be corrupt.
+                # If this is NOT the case, but any other URL has resulted in an error,
+                # mark the whole thing as corrupt.
+                if result_dl_segment.url is not urls[-1]:
+                    result_segments = False
+
+                    self.fn_logger.error("Something went wrong while downloading. File is corrupt!")
+
+                    for f in l_futures:
+                        f.cancel()
+
+                    break
 
-        # Only if no error happened while downloading.
-        if result_segments:
-            # Bring list into right order, so segments can be easily merged.
-            dl_segment_results.sort(key=lambda x: x.id_segment)
+                continue
 
-            result_merge = self._segments_merge(path_file, dl_segment_results)
+            data: bytearray = result_dl_segment.data
 
-            if not result_merge:
-                self.fn_logger.error(f"Something went wrong while writing to {media.name}. File is corrupt!")
-            elif isinstance(media, Track) and stream_manifest.is_encrypted:
-                key, nonce = decrypt_security_token(stream_manifest.encryption_key)
-                tmp_path_file_decrypted = path_file.with_suffix(".decrypted")
+            if decryptor:
+                decryptor.decrypt(data, output=data)
 
-                decrypt_file(path_file, tmp_path_file_decrypted, key, nonce)
+            f_target.write(data)
+            # Release the buffer as soon as it is on disk.
+            result_dl_segment.data = None
 
-        return result_merge, tmp_path_file_decrypted
+        return result_segments
+
+    def _stream_decryptor(self, media: Track | Video, stream_manifest: StreamManifest | None = None):
+        """Return a stream decryptor if the media is encrypted, otherwise None.
+
+        Args:
+            media (Track | Video): The media item.
+            stream_manifest (StreamManifest | None, optional): Stream manifest for tracks. Defaults to None.
+
+        Returns:
+            AES-CTR cipher object or None.
+        """
+        if isinstance(media, Track) and stream_manifest.is_encrypted:
+            key, nonce = decrypt_security_token(stream_manifest.encryption_key)
+
+            return stream_decryptor(key, nonce)
+
+        return None
 
     def _download(
         self,
@@ -333,7 +434,7 @@ class Download:
         path_file: pathlib.Path,
         stream_manifest: StreamManifest | None = None,
     ) -> tuple[bool, pathlib.Path]:
-        """Download a media item (track or video), handling segments and merging.
+        """Download a media item (track or video) straight into `path_file`, decrypting on the fly.
 
         Args:
             media (Track | Video): The media item to download.
@@ -341,7 +442,7 @@ class Download:
             stream_manifest (StreamManifest | None, optional): Stream manifest for tracks. Defaults to None.
 
         Returns:
-            tuple[bool, pathlib.Path]: (Success, path to downloaded or decrypted file)
+            tuple[bool, pathlib.Path]: (Success, path to downloaded file)
         """
         media_name: str = name_builder_item(media)
 
@@ -363,108 +464,88 @@ class Download:
         except Exception:
             return False, path_file
 
-        result_segments, dl_segment_results = self._download_segments(
-            urls, path_file.parent, block_size, p_task, progress_to_stdout
-        )
-
-        result_merge, tmp_path_file_decrypted = self._download_postprocess(
-            result_segments, path_file, dl_segment_results, media, stream_manifest
-        )
-
-        return result_merge, tmp_path_file_decrypted
-
-    def _segments_merge(self, path_file: pathlib.Path, dl_segment_results: list[DownloadSegmentResult]) -> bool:
-        """Merge downloaded segments into a single file and clean up segment files.
-
-        Args:
-            path_file (pathlib.Path): Path to the output file.
-            dl_segment_results (list[DownloadSegmentResult]): List of segment download results.
-
-        Returns:
-            bool: True if merge succeeded, False otherwise.
-        """
-        result: bool = True
-
-        # Copy the content of all segments into one file.
         try:
-            with path_file.open("wb") as f_target:
-                for dl_segment_result in dl_segment_results:
-                    with dl_segment_result.path_segment.open("rb") as f_segment:
-                        # Read and write junks, which gives better HDD write performance
-                        while segment := f_segment.read(CHUNK_SIZE):
-                            f_target.write(segment)
-
-                    # Delete segment from HDD
-                    dl_segment_result.path_segment.unlink()
-
+            result = self._download_segments(
+                urls, path_file, block_size, p_task, progress_to_stdout, self._stream_decryptor(media, stream_manifest)
+            )
         except Exception:
-            if dl_segment_result is not dl_segment_results[-1]:
-                result = False
+            result = False
 
-        return result
+        if not result:
+            self.fn_logger.error(f"Something went wrong while writing to {media.name}. File is corrupt!")
+
+        return result, path_file
 
     def _download_segment(
-        self, url: str, path_base: pathlib.Path, block_size: int | None, p_task: TaskID, progress_to_stdout: bool
+        self,
+        url: str,
+        block_size: int | None,
+        p_task: TaskID,
+        progress_to_stdout: bool,
+        f_target: BinaryIO | None = None,
+        decryptor=None,
     ) -> DownloadSegmentResult:
         """Download a single segment of a media file.
 
+        The segment is kept in memory unless `f_target` is given, in which case it is
+        streamed (and decrypted, if a decryptor is passed) directly into that file.
+
         Args:
             url (str): URL of the segment.
-            path_base (pathlib.Path): Base path for segment file.
             block_size (int | None): Block size for streaming.
             p_task (TaskID): Progress bar task ID.
             progress_to_stdout (bool): Whether to show progress in stdout.
+            f_target (BinaryIO | None, optional): Write directly into this file. Defaults to None.
+            decryptor (optional): Stream cipher used together with `f_target`.
 
         Returns:
             DownloadSegmentResult: Result of the segment download.
         """
         result: bool = False
-        path_segment: pathlib.Path = path_base / url_to_filename(url)
-        # Calculate the segment ID based on the file name within the URL.
-        filename_stem: str = str(path_segment.stem).split("_")[-1]
-        # CAUTION: This is a workaround, so BTS (LOW quality) track will work. They usually have only ONE link.
-        id_segment: int = int(filename_stem) if filename_stem.isdecimal() else 0
+        id_segment: int = segment_id_from_url(url)
         error: HTTPError | None = None
+        data: bytearray | None = None
 
         # If app is terminated (CTRL+C)
         if self.event_abort.is_set():
-            return DownloadSegmentResult(
-                result=False, url=url, path_segment=path_segment, id_segment=id_segment, error=error
-            )
+            return DownloadSegmentResult(result=False, url=url, id_segment=id_segment, error=error)
 
         if not self.event_run.is_set():
             self.event_run.wait()
 
-        # Retry download on failed segments, with an exponential delay between retries
-        with requests.Session() as s:
-            retries = Retry(total=5, backoff_factor=1)  # , status_forcelist=[ 502, 503, 504 ])
+        # The shared session retries failed segments, with an exponential delay between retries
+        try:
+            # Create the request object with stream=True, so the content won't be loaded into memory at once.
+            # Leaving the context hands the connection back to the pool.
+            with self.http_session.get(url, stream=True, timeout=REQUESTS_TIMEOUT_SEC) as r:
+                r.raise_for_status()
 
-            s.mount("https://", HTTPAdapter(max_retries=retries))
+                data = bytearray() if f_target is None else None
 
-            try:
-                # Create the request object with stream=True, so the content won't be loaded into memory at once.
-                r = s.get(url, stream=True, timeout=REQUESTS_TIMEOUT_SEC)
+                # If `chunk_size` is set to `None` the data is handed over as it arrives.
+                for chunk in r.iter_content(chunk_size=block_size):
+                    if f_target is None:
+                        data += chunk
+                    else:
+                        if decryptor:
+                            chunk = decryptor.decrypt(chunk)
 
-                r.raise_for_status()
+                        f_target.write(chunk)
 
-                # Write the content to disk. If `chunk_size` is set to `None` the whole file will be written at once.
-                with path_segment.open("wb") as f:
-                    for data in r.iter_content(chunk_size=block_size):
-                        f.write(data)
-                        # Advance progress bar.
-                        self.progress.advance(p_task)
+                    # Advance progress bar.
+                    self.progress.advance(p_task)
 
-                result = True
-            except Exception:
-                self.progress.advance(p_task)
+            result = True
+        except Exception as e:
+            data = None
+            error = e if isinstance(e, HTTPError) else None
+            self.progress.advance(p_task)
 
         # To send the progress to the GUI, we need to emit the percentage.
         if not progress_to_stdout:
             self.progress_gui.item.emit(self.progress.tasks[p_task].percentage)
 
-        return DownloadSegmentResult(
-            result=result, url=url, path_segment=path_segment, id_segment=id_segment, error=error
-        )
+        return DownloadSegmentResult(result=result, url=url, id_segment=id_segment, error=error, data=data)
 
     def extension_guess(
         self, quality_audio: Quality, metadata_tags: list[str], is_video: bool
@@ -1109,12 +1190,15 @@ class Download:
         return result
 
     @staticmethod
-    def cover_data(url: str | None = None, path_file: str | None = None) -> str | bytes:
+    def cover_data(
+        url: str | None = None, path_file: str | None = None, session: requests.Session | None = None
+    ) -> str | bytes:
         """Retrieve cover image data from a URL or file.
 
         Args:
             url (str | None, optional): URL to download image from. Defaults to None.
             path_file (str | None, optional): Path to image file. Defaults to None.
+            session (requests.Session | None, optional): Pooled session to download with. Defaults to None.
 
         Returns:
             str | bytes: Image data or empty string on failure.
@@ -1123,13 +1207,11 @@ class Download:
 
         if url:
             try:
-                response: requests.Response = requests.get(url, timeout=REQUESTS_TIMEOUT_SEC)
-                result = response.content
+                with (session or requests).get(url, timeout=REQUESTS_TIMEOUT_SEC) as response:
+                    result = response.content
             except Exception as e:
                 # TODO: Implement propper logging.
                 print(e)
-            finally:
-                response.close()
         elif path_file:
             try:
                 with open(path_file, "rb") as f:
@@ -1189,7 +1271,7 @@ class Download:
             url_cover = track.album.image(
                 int(cover_dimension) if cover_dimension != CoverDimensions.PxORIGIN else cover_dimension
             )
-            cover_data = self.cover_data(url=url_cover)
+            cover_data = self.cover_data(url=url_cover, session=self.http_session)
 
         if cover_data and self.settings.data.cover_album_file and is_parent_album:
             path_cover = self.cover_to_file(path_media.parent, cover_data)
@@ -1356,35 +1438,13 @@ class Download:
         Returns:
             list[pathlib.Path]: List of result directories.
         """
-        result_dirs: list[pathlib.Path] = []
-
-        # Iterate through list items
-        while not progress.finished:
-            with futures.ThreadPoolExecutor(max_workers=self.settings.data.downloads_concurrent_max) as executor:
-                # Dispatch all download tasks to worker threads
-                download_futures: list[futures.Future] = [
-                    executor.submit(
-                        self.item,
-                        media=item_media,
-                        file_template=file_name_relative,
-                        quality_audio=quality_audio,
-                        quality_video=quality_video,
-                        download_delay=download_delay,
-                        is_parent_album=is_album,
-                        list_position=count + 1,
-                        list_total=list_total,
-                    )
-                    for count, item_media in enumerate(items)
-                ]
-
-                # Process download results
-                result_dirs = self._process_download_futures(download_futures, progress, progress_task, progress_stdout)
-
-                # Check for abort signal
-                if self.event_abort.is_set():
-                    return result_dirs
+        # Dispatch all download tasks to the shared item pool
+        download_futures: list[futures.Future] = self._create_download_futures(
+            items, file_name_relative, quality_audio, quality_video, download_delay, is_album, list_total
+        )
 
-        return result_dirs
+        # Process download results
+        return self._process_download_futures(download_futures, progress, progress_task, progress_stdout)
 
     def _create_download_futures(
         self,
@@ -1407,24 +1467,25 @@ class Download:
             is_album (bool): Whether this is an album.
             list_total (int): Total number of items.
 
+        Items are submitted to the long-lived item pool, which runs `downloads_concurrent_max` of them at once.
+
         Returns:
             list[futures.Future]: List of download futures.
         """
-        with futures.ThreadPoolExecutor(max_workers=self.settings.data.downloads_concurrent_max) as executor:
-            return [
-                executor.submit(
-                    self.item,
-                    media=item_media,
-                    file_template=file_name_relative,
-                    quality_audio=quality_audio,
-                    quality_video=quality_video,
-                    download_delay=download_delay,
-                    is_parent_album=is_album,
-                    list_position=count + 1,
-                    list_total=list_total,
-                )
-                for count, item_media in enumerate(items)
-            ]
+        return [
+            self.executor_items.submit(
+                self.item,
+                media=item_media,
+                file_template=file_name_relative,
+                quality_audio=quality_audio,
+                quality_video=quality_video,
+                download_delay=download_delay,
+                is_parent_album=is_album,
+                list_position=count + 1,
+                list_total=list_total,
+            )
+            for count, item_media in enumerate(items)
+        ]
 
     def _process_download_futures(
         self,
@@ -1588,7 +1649,7 @@ class Download:
             for playlist in m3u8_variant.playlists:
                 if resolution_best < playlist.stream_info.resolution[1]:
                     resolution_best = playlist.stream_info.resolution[1]
-                    m3u8_playlist = m3u8.load(playlist.uri)
+                    m3u8_playlist = m3u8.load(playlist.uri, http_client=self.requests_client)
                     mime_type = playlist.stream_info.codecs
 
                     if quality == playlist.stream_info.resolution[1]:
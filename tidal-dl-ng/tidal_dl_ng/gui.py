@@ -115,6 +115,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
     settings: Settings
     tidal: Tidal
     dl: Download
+    dl_retired: list[Download]
     threadpool: QtCore.QThreadPool
     tray: QtWidgets.QSystemTrayIcon
     spinners: dict
@@ -159,6 +160,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         # XStream.stderr().messageWritten.connect(self._log_output)
 
         self.settings = Settings()
+        self.dl_retired = []
 
         self._init_threads()
         self._init_gui()
@@ -244,6 +246,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         )
         progress: Progress = Progress()
         handling_app: HandlingApp = HandlingApp()
+        dl_previous: Download | None = getattr(self, "dl", None)
         self.dl = Download(
             session=self.tidal.session,
             skip_existing=self.tidal.settings.data.skip_existing,
@@ -255,6 +258,19 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             event_run=handling_app.event_run,
         )
 
+        if dl_previous:
+            # A running queue item may still use it, so the queue watcher shuts it down between items.
+            self.dl_retired.append(dl_previous)
+
+    def _shutdown_dl_retired(self, wait: bool = True) -> None:
+        """Shut down `Download` objects replaced by `_init_dl` (settings saved, new login).
+
+        Args:
+            wait (bool, optional): Block until their pools have stopped. Defaults to True.
+        """
+        while self.dl_retired:
+            self.dl_retired.pop().shutdown(wait=wait)
+
     def _init_progressbar(self):
         """Initialize and add progress bars to the status bar."""
         self.pb_list = QtWidgets.QProgressBar()
@@ -1439,6 +1455,9 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         handling_app: HandlingApp = HandlingApp()
 
         while not handling_app.event_abort.is_set():
+            # No queue item is running here, so replaced `Download` objects are no longer in use.
+            self._shutdown_dl_retired()
+
             items: list[QtWidgets.QTreeWidgetItem | None] = self.tr_queue_download.findItems(
                 QueueDownloadStatus.Waiting, QtCore.Qt.MatchFlag.MatchExactly, column=0
             )
@@ -1676,6 +1695,11 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         handling_app: HandlingApp = HandlingApp()
         handling_app.event_abort.set()
 
+        if getattr(self, "dl", None):
+            self.dl.shutdown(wait=False)
+
+        self._shutdown_dl_retired(wait=False)
+
         event.accept()
 
 
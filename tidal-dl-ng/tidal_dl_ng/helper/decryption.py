@@ -1,9 +1,12 @@
 import base64
 import pathlib
+from typing import BinaryIO
 
 from Crypto.Cipher import AES
 from Crypto.Util import Counter
 
+from tidal_dl_ng.constants import CHUNK_SIZE
+
 
 def decrypt_security_token(security_token: str) -> (str, str):
     """
@@ -44,20 +47,59 @@ def decrypt_security_token(security_token: str) -> (str, str):
     return key, nonce
 
 
+def stream_decryptor(key: bytes, nonce: bytes):
+    """
+    Create an AES-CTR decryptor for a Tidal stream.
+
+    CTR keeps its counter between calls, so the returned object can be fed
+    consecutive chunks of the file and yields the same output as decrypting it in one go.
+
+    Args:
+      key (bytes): Audio stream key from `decrypt_security_token`.
+      nonce (bytes): Audio stream nonce from `decrypt_security_token`.
+
+    Returns:
+      A pycryptodome CTR cipher object.
+    """
+    counter = Counter.new(64, prefix=nonce, initial_value=0)
+
+    return AES.new(key, AES.MODE_CTR, counter=counter)
+
+
+def decrypt_into(f_src: BinaryIO, f_dst: BinaryIO, decryptor, buffer: bytearray | None = None) -> int:
+    """
+    Stream `f_src` through `decryptor` into `f_dst` using one reused buffer.
+
+    Args:
+      f_src (BinaryIO): Encrypted source opened in binary read mode.
+      f_dst (BinaryIO): Destination opened in binary write mode.
+      decryptor: Cipher object from `stream_decryptor`.
+      buffer (bytearray | None): Optional buffer to reuse across calls.
+
+    Returns:
+      int: Number of bytes written.
+    """
+    buffer = buffer if buffer is not None else bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    written: int = 0
+
+    while size := f_src.readinto(buffer):
+        chunk = view[:size]
+        # Decrypt in place, no per-chunk allocation.
+        decryptor.decrypt(chunk, output=chunk)
+        f_dst.write(chunk)
+        written += size
+
+    return written
+
+
 def decrypt_file(path_file_encrypted: pathlib.Path, path_file_destination: pathlib.Path, key: str, nonce: str) -> None:
     """
     Decrypts an encrypted MQA file given the file, key and nonce.
+    The file is processed in fixed-size chunks so memory use does not grow with the file size.
     TODO: Is it really only necessary for MQA of for all other formats, too?
     """
+    decryptor = stream_decryptor(key, nonce)
 
-    # Initialize counter and file decryptor
-    counter = Counter.new(64, prefix=nonce, initial_value=0)
-    decryptor = AES.new(key, AES.MODE_CTR, counter=counter)
-
-    # Open and decrypt
-    with path_file_encrypted.open("rb") as f_src:
-        audio_decrypted = decryptor.decrypt(f_src.read())
-
-        # Replace with decrypted file
-        with path_file_destination.open("wb") as f_dst:
-            f_dst.write(audio_decrypted)
+    with path_file_encrypted.open("rb") as f_src, path_file_destination.open("wb") as f_dst:
+        decrypt_into(f_src, f_dst, decryptor)
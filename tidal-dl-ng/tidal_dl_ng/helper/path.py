@@ -618,3 +618,21 @@ def url_to_filename(url: str) -> str:
         raise ValueError  # reject '%2f' or 'dir%5Cbasename.ext' on Windows
 
     return basename
+
+
+def segment_id_from_url(url: str) -> int:
+    """Get the position of a DASH/HLS segment from the number at the end of its file name.
+
+    Args:
+        url (str): The segment URL.
+
+    Returns:
+        int: The segment ID, or 0 if the file name carries no number.
+    """
+    try:
+        filename_stem: str = pathlib.Path(url_to_filename(url)).stem.split("_")[-1]
+    except ValueError:
+        return 0
+
+    # CAUTION: This is a workaround, so BTS (LOW quality) track will work. They usually have only ONE link.
+    return int(filename_stem) if filename_stem.isdecimal() else 0
@@ -1,4 +1,3 @@
-import pathlib
 from dataclasses import dataclass
 
 from requests import HTTPError
@@ -8,6 +7,6 @@ from requests import HTTPError
 class DownloadSegmentResult:
     result: bool
     url: str
-    path_segment: pathlib.Path
     id_segment: int
     error: HTTPError | None = None
+    data: bytearray | None = None